@@ -2,9 +2,31 @@ import streamlit as st
 import pandas as pd
 import os
 import io
-import re
-import sqlite3
 from datetime import datetime
+from composite import CompositeEngine
+from batch_io import BATCH_FILE_TYPES, iter_batch_frames, judge_stream
+from history_db import (init_db, save_to_db, save_many_to_db, load_history_page, count_history,
+                        history_distinct, history_version, load_summary, delete_ids_from_db, clear_all_db)
+from ledger_export import export_bytes
+from moisture import DRIED_COLUMNS, load_moisture_table, moisture_defaults, judge_dried_batch
+from reg_loader import CSV_FILE
+from reg_version import RegulationManager
+from verdict import get_limit_info, judge_batch, BATCH_COLUMNS, FAIL_LABEL
+import profiling as prof
+
+# 성능 모니터가 켜져 있을 때만 측정 래퍼로 교체 (꺼져 있으면 원래 함수 그대로라 비용 없음)
+lap = prof.Laps()
+get_limit_info = prof.timed("verdict.get_limit_info", get_limit_info)
+judge_batch = prof.timed("verdict.judge_batch", judge_batch)
+judge_dried_batch = prof.timed("moisture.judge_dried_batch", judge_dried_batch)
+save_to_db = prof.timed("db.save_to_db", save_to_db)
+save_many_to_db = prof.timed("db.save_many_to_db", save_many_to_db)
+load_history_page = prof.timed("db.load_history_page", load_history_page)
+count_history = prof.timed("db.count_history", count_history)
+history_version = prof.timed("db.history_version", history_version)
+load_summary = prof.timed("db.load_summary", load_summary)
+delete_ids_from_db = prof.timed("db.delete_ids_from_db", delete_ids_from_db)
+clear_all_db = prof.timed("db.clear_all_db", clear_all_db)
 
 # --- 1. 기본 설정 (Enterprise Layout) ---
 st.set_page_config(
@@ -48,39 +70,11 @@ st.markdown("""
     }
     </style>
     """, unsafe_allow_html=True)
+lap("css")
 
 # --- 2. Database Handling ---
-DB_FILE = "history.db"
-
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, 검사일자 TEXT, 의뢰부서 TEXT, 식품명 TEXT, 농약명 TEXT, 검출량 REAL, 허용기준 REAL, 초과량 REAL, 판정 TEXT, 조치내용 TEXT, 적용기준 TEXT, 비고 TEXT)''')
-    conn.commit(); conn.close()
-
-def save_to_db(dept, food, pest, amount, limit, action, standard, note=""):
-    if not dept: dept = "-"
-    excess = round(amount - limit, 4) if amount > limit else 0.0
-    conn = sqlite3.connect(DB_FILE); c = conn.cursor()
-    c.execute("INSERT INTO history (검사일자, 의뢰부서, 식품명, 농약명, 검출량, 허용기준, 초과량, 판정, 조치내용, 적용기준, 비고) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-              (datetime.now().strftime("%Y-%m-%d %H:%M"), dept, food, pest, amount, limit, excess, "부적합", action, standard, note))
-    conn.commit(); conn.close()
-
-def load_history_db():
-    conn = sqlite3.connect(DB_FILE)
-    try: return pd.read_sql("SELECT * FROM history ORDER BY id DESC", conn)
-    except: return pd.DataFrame()
-    finally: conn.close()
-
-def delete_ids_from_db(ids):
-    conn = sqlite3.connect(DB_FILE); c = conn.cursor()
-    c.execute(f"DELETE FROM history WHERE id IN ({','.join(['?']*len(ids))})", ids)
-    conn.commit(); conn.close()
-
-def clear_all_db():
-    conn = sqlite3.connect(DB_FILE); c = conn.cursor(); c.execute("DELETE FROM history"); conn.commit(); conn.close()
-
 init_db()
+lap("init_db")
 
 # --- 3. Sidebar ---
 with st.sidebar:
@@ -93,6 +87,8 @@ with st.sidebar:
     st.markdown("---")
     st.caption("DB Status: Connected 🟢")
 
+lap("sidebar")
+
 # --- 4. Header ---
 st.markdown("""
     <div class="top-header">
@@ -102,92 +98,91 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 5. Logic & Data (핵심 수정 완료) ---
-# 숫자만 추출하는 강력한 함수
-def clean_amount(val):
-    try: 
-        # 문자열로 변환 후 0-9와 .(점)만 남기고 다 삭제
-        clean_str = re.sub(r'[^0-9.]', '', str(val))
-        if not clean_str: return 0.0 # 빈 값이면 0.0 반환
-        return float(clean_str)
-    except: return 0.0
-
-# [수정됨] CSV 파일 읽기 오류 해결 버전 (sep=None 적용)
-@st.cache_data
-def load_data():
-    csv_file = 'data.csv'
-    
-    # 1. 파일 존재 여부 확인
-    if not os.path.exists(csv_file):
-        st.error(f"🚨 파일이 서버 경로에 없습니다. 현재 경로: {os.getcwd()}")
-        return None
-
-    df = None
-    # 2. 인코딩 3단 변신 (utf-8 -> cp949 -> euc-kr)
-    encodings = ['utf-8', 'cp949', 'euc-kr']
-    
-    for enc in encodings:
-        try:
-            # ★ 핵심 수정: sep=None, engine='python'으로 구분자 자동 감지 ★
-            df = pd.read_csv(csv_file, encoding=enc, sep=None, engine='python')
-            
-            # 컬럼명 공백 제거 (안전장치)
-            df.columns = df.columns.str.strip()
-
-            # 필수 컬럼이 있는지 확인 (엉뚱하게 읽히는 것 방지)
-            if 'food_type' in df.columns and 'pesticide_name' in df.columns:
-                df['food_type'] = df['food_type'].astype(str).str.strip()
-                df['pesticide_name'] = df['pesticide_name'].astype(str).str.strip()
-                return df
-            else:
-                continue # 인코딩은 맞는데 내용이 깨진 경우 다음 시도
-                
-        except Exception:
-            continue # 읽기 에러나면 다음 인코딩 시도
-
-    # 3. 모든 인코딩 실패 시
+# 기준표 관리자: 인코딩/구분자 1회 판별 + C 엔진 파싱 + pickle 스냅샷 (reg_loader.py) 으로 읽은 표와
+# 조회 인덱스를 프로세스당 하나 들고 있다가, data.csv 가 바뀌면 재시작 없이 교체하고 대장을 재판정 (reg_version.py)
+@st.cache_resource
+def load_regulation():
+    return RegulationManager(CSV_FILE)
+
+PREVIEW_ROWS = 1000 # 파일 판정 시 화면에 남겨두는 부적합 행 수 상한
+
+# 복합원재료 엔진 (식품 x 농약 기준 행렬) - 기준표 버전당 한 번
+@st.cache_resource(max_entries=2)
+def load_composite(_idx, version):
+    return CompositeEngine(_idx)
+
+# 원물/건조 수분표 (moisture.csv) - 프로세스당 한 번
+@st.cache_resource
+def load_moisture():
+    return load_moisture_table()
+
+reg_mgr = load_regulation()
+try:
+    reg_change = reg_mgr.refresh() # 파일 크기/수정시각만 비교 (바뀌었을 때만 다시 읽음)
+except FileNotFoundError:
+    reg_change = None
+    st.error(f"🚨 파일이 서버 경로에 없습니다. 현재 경로: {os.getcwd()}")
+except Exception:
+    # 인코딩/형식 판별 실패 시 (이미 읽은 기준표가 있으면 그대로 사용)
+    reg_change = None
     st.error("❌ 파일을 읽을 수 없습니다. (CSV 형식이 훼손되었거나 호환되지 않습니다)")
-    return None
-
-df = load_data()
-if df is None: st.stop() # 에러 메시지는 위에서 출력했으므로 멈추기만 함
-
-food_list = sorted(df['food_type'].unique().tolist())
-pesticide_list = sorted(df['pesticide_name'].unique().tolist())
-MOISTURE_DB = {"고추": {"raw": 83.0, "dried": 14.0}, "마늘": {"raw": 65.0, "dried": 10.0}, "양파": {"raw": 90.0, "dried": 12.0}}
-
-# 기준값 가져오기 함수
-def get_limit_info(df, food, pest_input):
-    exact_pest = df[df['pesticide_name'] == pest_input]
-    target_pest = pest_input if not exact_pest.empty else pest_input
-    if exact_pest.empty:
-        partial = df[df['pesticide_name'].str.contains(pest_input, case=False, regex=False)]
-        if not partial.empty: target_pest = partial.iloc[0]['pesticide_name']
-    
-    match = df[(df['food_type'] == food) & (df['pesticide_name'] == target_pest)]
-    
-    if not match.empty: 
-        raw_val = match.iloc[0]['limit_mg_kg']
-        limit_val = clean_amount(raw_val)
-        return target_pest, limit_val, "식약처 고시"
-    else: 
-        return target_pest, 0.01, "PLS (0.01)"
+# 다른 세션의 refresh() 가 중간에 교체해도 기준표/인덱스/버전이 섞이지 않게 state 를 한 번만 읽는다
+reg_state = reg_mgr.state
+if reg_state is None: st.stop() # 에러 메시지는 위에서 출력했으므로 멈추기만 함
+if reg_change is not None and reg_state.version > 1:
+    st.toast(f"기준표 개정 반영: 기준 {len(reg_change.diff):,}건 변경 · 대장 {reg_change.rejudged:,}건 재판정")
+df, reg_idx, reg_ver = reg_state.table, reg_state.index, reg_state.version
+lap("load_data")
+comp_eng = load_composite(reg_idx, reg_ver)
+lap("load_index")
+
+# 선택 목록도 기준표 버전당 한 번만 정렬 (재실행마다 unique/sort 하지 않음)
+@st.cache_resource(max_entries=2)
+def load_options(_df, version):
+    return sorted(_df['food_type'].unique().tolist()), sorted(_df['pesticide_name'].unique().tolist())
+
+food_list, pesticide_list = load_options(df, reg_ver)
+moist_tbl = load_moisture()
+lap("option_lists")
 
 # --- 6. Dashboard ---
-hist = load_history_db()
-today_cnt = len(hist[hist['검사일자'].str.contains(datetime.now().strftime("%Y-%m-%d"))]) if not hist.empty else 0
+# 대장 조회 캐시: DB 버전(max id, 쓰기 번호, 기준개정 번호)이 바뀔 때만 다시 읽는다
+@st.cache_data(max_entries=2)
+def cached_summary(version, today):
+    return load_summary(today)
+
+@st.cache_data(max_entries=64)
+def cached_history_page(version, filters, page, page_size):
+    return load_history_page(filters, page, page_size)
+
+@st.cache_data(max_entries=64)
+def cached_history_count(version, filters):
+    return count_history(filters)
+
+@st.cache_data(max_entries=8)
+def cached_history_distinct(version, key):
+    return history_distinct(key)
+
+hist_ver = history_version()
+summ = cached_summary(hist_ver, datetime.now().strftime("%Y-%m-%d"))
 st.markdown("##### 📊 Executive Summary")
 k1, k2, k3, k4 = st.columns(4)
-with k1: st.metric("누적 부적합", f"{len(hist)}건", delta=f"금일 +{today_cnt}")
-with k2: st.metric("Risk 부서", hist['의뢰부서'].mode()[0] if not hist.empty else "-", "High")
-with k3: st.metric("주요 품목", hist['식품명'].mode()[0] if not hist.empty else "-", "Check")
+with k1: st.metric("누적 부적합", f"{summ['total']}건", delta=f"금일 +{summ['today']}")
+with k2: st.metric("Risk 부서", summ['top_dept'], "High")
+with k3: st.metric("주요 품목", summ['top_food'], "Check")
 with k4: st.metric("시스템 상태", "Stable", "v4.1 Fixed")
 st.markdown("---")
+lap("dashboard")
 
 # --- 7. Tabs ---
-t1, t2, t3, t4, t5 = st.tabs(["🔬 정밀 검사", "🌭 가공식품(건조)", "🥗 복합원재료", "📑 일괄 분석", "📈 통합 대장"])
+# 탭마다 fragment 로 분리: 탭 안의 위젯 조작은 그 탭만 다시 실행한다 (다른 탭/대시보드는 그대로)
+# DB 에 저장/삭제한 뒤에는 st.rerun() 으로 전체를 다시 그려 대시보드와 대장을 갱신한다
+def tab_fragment(name):
+    return lambda fn: st.fragment(prof.timed(f"rerun.{name}", fn))
 
 # [Tab 1: 정밀 검사]
-with t1:
+@tab_fragment("tab1")
+def tab_single():
     col_info, col_main = st.columns([1, 2])
     with col_info:
         st.markdown("""
@@ -210,7 +205,7 @@ with t1:
             
             if st.button("분석 실행", key="b1", type="primary"):
                 if f and p:
-                    rp, l, s = get_limit_info(df, f, p)
+                    rp, l, s = get_limit_info(reg_idx, f, p)
                     st.session_state['ar'] = {'f':f, 'p':rp, 'a':a, 'l':l, 's':s, 'bad':a>l}
                 else: st.warning("선택 필요")
             
@@ -242,7 +237,8 @@ with t1:
                     else: st.success("**✅ 판정: 적합**\n\n안전 관리 기준 이내입니다.")
 
 # [Tab 2: 건조 식품]
-with t2:
+@tab_fragment("tab2")
+def tab_dried():
     col_info, col_main = st.columns([1, 2])
     with col_info:
         st.markdown("""
@@ -262,8 +258,7 @@ with t2:
             with c1: rf = st.selectbox("원물", food_list, key="t2f", index=None)
             with c2: tp = st.selectbox("농약", pesticide_list, key="t2p", index=None)
             
-            dm_raw, dm_dry = 0.0, 0.0
-            if rf in MOISTURE_DB: dm_raw, dm_dry = MOISTURE_DB[rf]['raw'], MOISTURE_DB[rf]['dried']
+            dm_raw, dm_dry = moisture_defaults(moist_tbl, rf)
             
             c1,c2,c3 = st.columns([2,2,1])
             with c1: mr = st.number_input("원물 수분(%)", value=dm_raw, key="tmr")
@@ -274,7 +269,7 @@ with t2:
             amt = st.number_input("검출량 (mg/kg)", 0.0, format="%.4f", key="t2a")
             if st.button("환산 판정", type="primary"):
                 if rf and tp:
-                    rp, l, s = get_limit_info(df, rf, tp)
+                    rp, l, s = get_limit_info(reg_idx, rf, tp)
                     cl = l * fac
                     
                     st.divider()
@@ -303,8 +298,37 @@ with t2:
                                     st.toast("저장 완료!"); st.rerun()
                         else: st.success("**✅ 적합**")
 
+        # 일괄 환산: 수분 칸을 비우면 수분표(moisture.csv) 값을 쓴다
+        with st.container(border=True):
+            st.markdown("###### 📑 일괄 환산 판정")
+            st.caption("원물, 농약, 검출량[, 원물수분, 건조수분] 순 · 수분 칸이 비면 수분표 값 사용, 그래도 한쪽이 비면 배수 1.0 (원물 기준 그대로) · "
+                       f"수분표는 출처가 확인된 {len(moist_tbl)}개 식품만 담고 있어 그 밖의 식품은 수분값을 직접 입력")
+            c1, c2 = st.columns(2)
+            with c1: bd = st.text_input("부서", key="t2bd")
+            with c2: ba = st.selectbox("조치", ["폐기"], key="t2ba")
+            btx = st.text_area("Data", "고추\tKasugamycin\t0.5\n마늘\tDiazinon\t0.1\t65\t8", height=100, key="t2bt")
+            bup = st.file_uploader("또는 파일 (CSV / TSV / XLSX)", type=BATCH_FILE_TYPES, key="t2up")
+            if st.button("일괄 환산 실행", key="t2run", type="primary"):
+                try:
+                    # 파일/붙여넣기 모두 batch_io 리더 (인코딩/구분자 판별, 헤더 행 처리, chunk 단위)
+                    src, name = (bup, bup.name) if bup is not None else (io.BytesIO(btx.encode('utf-8')), "paste.txt")
+                    shown, sv = [], 0
+                    for chunk, _ in iter_batch_frames(src, name, columns=DRIED_COLUMNS):
+                        rs = judge_dried_batch(reg_idx, moist_tbl, chunk)
+                        sv += save_many_to_db(bd, rs[rs['판정'] == FAIL_LABEL], ba)
+                        room = PREVIEW_ROWS - sum(map(len, shown))
+                        if room > 0: shown.append(rs.head(room))
+                    rs = pd.concat(shown, ignore_index=True)
+                    st.dataframe(rs.style.map(lambda v: 'background-color:#ffe6e6' if '부적합' in v else '', subset=['판정'])
+                                 .format({'농축배수': '{:.2f}', '기준': '{:.4f}'}), use_container_width=True)
+                    if sv: st.error(f"{sv}건 저장 완료")
+                    else: st.success("완료")
+                except ValueError as e: st.error(f"데이터 형식을 확인하세요. ({e})")
+                except Exception: st.error("데이터 형식을 확인하세요.")
+
 # [Tab 3: 복합원재료]
-with t3:
+@tab_fragment("tab3")
+def tab_composite():
     if 'recipe_df' not in st.session_state:
         st.session_state['recipe_df'] = pd.DataFrame([{"원료명": "양상추", "배합비율(%)": 50.0}, {"원료명": "오이", "배합비율(%)": 30.0}])
     
@@ -333,15 +357,9 @@ with t3:
             
             if st.button("복합 기준 산출 및 판정", type="primary"):
                 if prod_name and target_pest:
-                    final_limit = 0.0
-                    calc_log = ""
-                    for idx, row in edited_recipe.iterrows():
-                        r_f = row['원료명']
-                        r_r = row['배합비율(%)'] / 100.0
-                        rp, l, s = get_limit_info(df, r_f, target_pest)
-                        contrib = l * r_r
-                        final_limit += contrib
-                        calc_log += f"• {r_f}: 기준 {l} × 비율 {row['배합비율(%)']}% = {contrib:.4f}\n"
+                    final_limit = comp_eng.limit_of(edited_recipe, target_pest)[1]
+                    _, bd = comp_eng.breakdown(edited_recipe, target_pest)
+                    calc_log = "".join(f"• {r_f}: 기준 {l} × 비율 {r_p}% = {contrib:.4f}\n" for r_f, r_p, l, _, contrib in bd.itertuples(index=False))
                     
                     st.divider()
                     st.markdown("###### 🧾 산출 근거 (Calculation Logic)")
@@ -367,14 +385,50 @@ with t3:
                                     st.toast("저장 완료!"); st.rerun()
                         else: st.success("**✅ 적합**")
 
+        # 다성분 동시 분석: 기준표 전체 농약의 가중평균 기준을 한 번에 계산해 결과표 전체를 판정
+        with st.container(border=True):
+            st.markdown("###### 🧪 다성분 일괄 판정 (Multi-residue)")
+            st.caption("결과표를 붙여넣으세요 (농약, 검출량). 배합표는 위 표를 그대로 사용합니다.")
+            mtx = st.text_area("결과표", key="t3_multi", height=120, placeholder="Diazinon\t0.02\n아세타미프리드\t0.3")
+            m1, m2 = st.columns(2)
+            with m1: md_ = st.text_input("부서", key="t3md")
+            with m2: ma_ = st.selectbox("조치", ["폐기"], key="t3ma")
+            if st.button("다성분 판정", key="t3_multi_run", type="primary"):
+                if not prod_name: st.warning("제품명 입력 필요")
+                else:
+                    try:
+                        sheet = pd.read_csv(io.StringIO(mtx), sep=None, names=['농약','검출량'], engine='python')
+                        rs = comp_eng.judge(edited_recipe, sheet, prod_name)
+                        bad = rs[rs['판정'] == FAIL_LABEL]
+                        sv = save_many_to_db(md_, bad, ma_, "복합(다성분)")
+                        st.session_state['t3_multi_rs'] = rs
+                        st.dataframe(rs.style.map(lambda v: 'background-color:#ffe6e6' if '부적합' in v else '', subset=['판정']), use_container_width=True)
+                        if sv: st.error(f"{len(rs)}종 중 {sv}건 부적합 저장 완료")
+                        else: st.success(f"{len(rs)}종 모두 적합")
+                    except Exception: st.error("결과표 형식을 확인하세요.")
+
+            # 원료별 기여도는 필요할 때만 계산
+            if st.session_state.get('t3_multi_rs') is not None:
+                bp = st.selectbox("기여도 확인 농약", st.session_state['t3_multi_rs']['농약'].unique().tolist(), index=None, key="t3_bd")
+                if bp:
+                    rp, bd = comp_eng.breakdown(edited_recipe, bp)
+                    st.dataframe(bd, use_container_width=True, hide_index=True)
+                    st.caption(f"{rp} 가중평균 기준: {bd['기여도'].sum():.4f} mg/kg")
+
+            with st.expander("전체 농약 가중평균 기준표"):
+                all_lim = comp_eng.limits(edited_recipe).rename_axis('농약').reset_index()
+                st.dataframe(all_lim, use_container_width=True, hide_index=True, height=250)
+
 # [Tab 4: 일괄 분석]
-with t4:
+@tab_fragment("tab4")
+def tab_batch():
     col_info, col_main = st.columns([1, 2])
     with col_info:
         st.markdown("""
         <div class="info-box">
         <b>📘 대량 데이터 자동 처리</b><br><br>
-        엑셀 등의 데이터를 일괄로 복사하여 붙여넣으면, 각 행마다 <b>[Tab 1]</b>과 동일한 로직(식약처 고시 우선, 없으면 PLS)을 적용하여 자동으로 판정합니다.
+        엑셀 등의 데이터를 일괄로 복사하여 붙여넣으면, 각 행마다 <b>[Tab 1]</b>과 동일한 로직(식약처 고시 우선, 없으면 PLS)을 적용하여 자동으로 판정합니다.<br><br>
+        영문명·CAS 번호는 별칭표(pesticide_aliases.csv)로, 부분 입력은 기준표 농약명에 자동 매칭됩니다. 오타로 보이는 이름은 자동 적용하지 않고(PLS) 추천 후보만 보여줍니다.
         </div>
         """, unsafe_allow_html=True)
         if st.button("📋 테스트 데이터 로드"): st.session_state['pp'] = "가지\tKasugamycin\t0.5T\n감자\tDiazinon\t0.01"
@@ -388,36 +442,76 @@ with t4:
             tx = st.text_area("Data", st.session_state.get('pp',""), height=100)
             if st.button("일괄 실행", type="primary"):
                 try:
-                    bdf = pd.read_csv(io.StringIO(tx), sep=None, names=['식품','농약','검출량'], engine='python')
-                    rs, sv = [], 0
-                    bar = st.progress(0)
-                    for i,r in bdf.iterrows():
-                        f,p,v = str(r['식품']).strip(), str(r['농약']).strip(), clean_amount(r['검출량'])
-                        rp,l,s = get_limit_info(df,f,p)
-                        stt = "✅ 적합"
-                        if v>l: stt="🚨 부적합"; save_to_db(d,f,rp,v,l,a,s,"일괄"); sv+=1
-                        rs.append([f,rp,v,l,s,stt]); bar.progress((i+1)/len(bdf))
-                    st.dataframe(pd.DataFrame(rs, columns=['식품','농약','검출량','기준','구분','판정']).style.applymap(lambda v: 'background-color:#ffe6e6' if '부적합' in v else '', subset=['판정']), use_container_width=True)
+                    bdf = pd.read_csv(io.StringIO(tx), sep=None, names=BATCH_COLUMNS, engine='python')
+                    rs = judge_batch(reg_idx, bdf)
+                    bad = rs[rs['판정'] == FAIL_LABEL]
+                    sv = save_many_to_db(d, bad, a, "일괄")
+                    st.dataframe(rs.style.map(lambda v: 'background-color:#ffe6e6' if '부적합' in v else '', subset=['판정']), use_container_width=True)
                     if sv: st.error(f"{sv}건 저장 완료")
                     else: st.success("완료")
+                    unknown = [p for p in rs['농약'].unique() if p not in reg_idx.resolver.name_set]
+                    if unknown: st.warning("기준표에 없는 농약명 (PLS 적용) · 추천: " + " / ".join(
+                        f"{p} → {', '.join(reg_idx.suggest_pest(p)) or '없음'}" for p in unknown[:20]))
                 except: st.error("데이터 형식을 확인하세요.")
 
+        # 대용량 파일: chunk 단위로 읽고 판정/저장하면서 진행률과 부적합 건을 바로 보여준다 (메모리 일정)
+        with st.container(border=True):
+            st.markdown("###### 📂 File Upload (대용량)")
+            up = st.file_uploader("CSV / TSV / XLSX (식품, 농약, 검출량 순)", type=BATCH_FILE_TYPES, key="t4up")
+            if up is not None and st.button("파일 판정 실행", key="t4run", type="primary"):
+                try:
+                    bar = st.progress(0.0, "판정 중..."); live = st.empty()
+                    n, sv, shown = 0, 0, []
+                    for rs, bad, prog in judge_stream(reg_idx, iter_batch_frames(up, up.name)):
+                        sv += save_many_to_db(d, bad, a, "일괄(파일)")
+                        n += len(rs)
+                        room = PREVIEW_ROWS - sum(map(len, shown))
+                        if room > 0 and not bad.empty:
+                            shown.append(bad.head(room))
+                            live.dataframe(pd.concat(shown, ignore_index=True), use_container_width=True)
+                        bar.progress(prog, f"{n:,}행 판정 · 부적합 {sv:,}건")
+                    bar.progress(1.0, f"{n:,}행 판정 완료")
+                    if sv: st.error(f"{sv:,}건 저장 완료" + (f" (미리보기는 {PREVIEW_ROWS:,}건까지)" if sv > PREVIEW_ROWS else ""))
+                    else: st.success(f"{n:,}행 모두 적합")
+                except ValueError as e: st.error(f"파일 형식을 확인하세요. ({e})")
+                except Exception: st.error("파일 형식을 확인하세요.")
+
 # [Tab 5: 통합 대장]
-with t5:
+@tab_fragment("tab5")
+def tab_ledger():
     c1, c2 = st.columns([4,1])
     with c1: st.markdown("##### 📈 통합 대장 (Persistent DB)")
     with c2: 
         if st.button("새로고침"): st.rerun()
     
-    if not hist.empty:
+    # fragment 만 다시 실행될 때도 다른 탭의 저장분이 보이도록 버전을 직접 확인
+    hist_ver = history_version()
+    if cached_history_count(hist_ver, None): # 적합으로 재판정된 행만 남아도 대장은 보여야 한다
+        summ = cached_summary(hist_ver, datetime.now().strftime("%Y-%m-%d"))
         with st.container(border=True):
-            dfc = hist.copy(); dfc['M'] = pd.to_datetime(dfc['검사일자']).dt.strftime('%Y-%m')
             c1,c2=st.columns(2)
-            with c1: st.bar_chart(dfc['M'].value_counts().sort_index(), color="#DA291C", height=150)
-            with c2: st.bar_chart(dfc['식품명'].value_counts().head(5), height=150)
+            with c1: st.bar_chart(summ['monthly'], color="#DA291C", height=150)
+            with c2: st.bar_chart(summ['top_foods'], height=150)
         
-        hist['선택'] = False
-        edf = st.data_editor(hist[['선택','id','검사일자','의뢰부서','식품명','농약명','검출량','허용기준','판정','적용기준','비고']], use_container_width=True, hide_index=True, column_config={"선택":st.column_config.CheckboxColumn(width="small"), "id":st.column_config.NumberColumn(width="small", disabled=True)}, key="he_db")
+        # 필터/페이지는 SQL로 처리하고 현재 페이지만 편집기에 올린다
+        with st.expander("🔍 검색 조건", expanded=False):
+            f1,f2,f3,f4 = st.columns(4)
+            with f1: dr = st.date_input("검사일자", value=(), key="h_dr")
+            with f2: fd = st.selectbox("의뢰부서", cached_history_distinct(hist_ver, 'dept'), index=None, key="h_dept")
+            with f3: ff = st.selectbox("식품명", cached_history_distinct(hist_ver, 'food'), index=None, key="h_food")
+            with f4: fp = st.selectbox("농약명", cached_history_distinct(hist_ver, 'pest'), index=None, key="h_pest")
+        flt = {'date_from': str(dr[0]) if len(dr) > 0 else None, 'date_to': str(dr[-1]) if len(dr) > 0 else None,
+               'dept': fd, 'food': ff, 'pest': fp}
+        total = cached_history_count(hist_ver, flt)
+        p1,p2,p3 = st.columns([1,1,4])
+        with p1: psz = st.selectbox("페이지 크기", [50, 100, 500], index=1, key="h_psz")
+        n_pages = max(1, -(-total // psz))
+        with p2: pg = st.number_input("페이지", 1, n_pages, 1, key="h_pg")
+        with p3: st.caption(f"검색 결과 {total}건 · {pg}/{n_pages} 페이지")
+
+        page_df = cached_history_page(hist_ver, flt, pg, psz).copy()
+        page_df['선택'] = False
+        edf = st.data_editor(page_df[['선택','id','검사일자','의뢰부서','식품명','농약명','검출량','허용기준','판정','적용기준','비고']], use_container_width=True, hide_index=True, column_config={"선택":st.column_config.CheckboxColumn(width="small"), "id":st.column_config.NumberColumn(width="small", disabled=True)}, key="he_db")
         
         b1,b2,b3 = st.columns([1,1,4])
         with b1:
@@ -427,10 +521,38 @@ with t5:
         with b2:
             if st.button("⚠️ 전체 초기화"): st.session_state['confirm']=True
         with b3:
-            st.download_button("다운로드", edf.drop(columns=['선택']).to_csv(index=False).encode('utf-8-sig'), "Report.csv")
+            # 클릭 시에만 DB에서 청크 단위로 스트리밍해서 생성 (검색 조건 동일 적용)
+            d1,d2,_ = st.columns([1,1,2])
+            with d1: st.download_button("다운로드 (CSV)", lambda: export_bytes('csv', flt), "Report.csv", mime="text/csv")
+            with d2: st.download_button("다운로드 (XLSX)", lambda: export_bytes('xlsx', flt), "Report.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
         if st.session_state.get('confirm'):
             st.warning("정말 삭제하시겠습니까?")
             if st.button("Yes"): clear_all_db(); st.session_state['confirm']=False; st.rerun()
             if st.button("No"): st.session_state['confirm']=False; st.rerun()
     else: st.info("데이터 없음")
+
+t1, t2, t3, t4, t5 = st.tabs(["🔬 정밀 검사", "🌭 가공식품(건조)", "🥗 복합원재료", "📑 일괄 분석", "📈 통합 대장"])
+with t1: tab_single()
+with t2: tab_dried()
+with t3: tab_composite()
+with t4: tab_batch()
+with t5: tab_ledger()
+lap("tabs")
+
+# --- 8. 성능 모니터 (관리자) ---
+with st.sidebar:
+    with st.expander("⏱️ 성능 모니터 (관리자)"):
+        # 측정 여부는 프로세스 전체 설정: 위젯 값은 매번 전역 상태로 맞추고, 바꿀 때만(on_change) 전역을 바꾼다
+        st.session_state['prof_on'] = prof.enabled()
+        st.toggle("측정 사용", key="prof_on", on_change=lambda: prof.set_enabled(st.session_state['prof_on']))
+        stats = prof.snapshot()
+        if stats: st.dataframe(pd.DataFrame(stats)[['name','calls','p50_ms','p95_ms','p99_ms','last_ms']], hide_index=True, use_container_width=True)
+        else: st.caption("측정값 없음 (측정 사용 후 화면을 조작하면 쌓입니다)")
+        c1,c2,c3 = st.columns(3)
+        with c1: st.download_button("JSON", prof.dump_json, "profile.json", mime="application/json")
+        with c2:
+            if st.button("로그", key="prof_log"): prof.log_snapshot(); st.toast("로그 기록 완료")
+        with c3:
+            if st.button("초기화", key="prof_reset"): prof.reset(); st.rerun()
+lap.done()
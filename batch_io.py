@@ -0,0 +1,116 @@
+import io
+import os
+import re
+
+import pandas as pd
+
+from reg_loader import SNIFF_BYTES, sniff_bytes
+from verdict import BATCH_COLUMNS, FAIL_LABEL, judge_batch
+
+CHUNK_ROWS = 50_000
+SHARD_BYTES = 8 << 20 # judge_cli 워커 하나가 맡는 CSV 바이트 범위
+BATCH_FILE_TYPES = ['csv', 'tsv', 'txt', 'xlsx']
+
+
+# 헤더 행으로 보는 컬럼 이름 (공백/괄호 단위 제거, 소문자) - columns 의 이름도 포함
+HEADER_NAMES = {
+    '식품', '식품명', '원물', '원물명', '품목', '품목명', '시료', '시료명', 'food', 'food_type', 'sample',
+    '농약', '농약명', '성분', '성분명', '농약성분', '분석항목', '항목', 'pesticide', 'pesticide_name', 'analyte',
+    '검출량', '검출값', '결과', '결과값', '측정값', 'amount', 'result', 'value',
+    '원물수분', '건조수분',
+}
+
+def _header_key(value):
+    return re.sub(r'\s+|[(\[].*$', '', str(value or '')).lower()
+
+# 첫 행의 앞 3칸 중 하나라도 컬럼 이름이면 헤더 행 (예: "식품,농약,검출량", "시료명,농약명,결과(mg/kg)")
+# 검출량 칸의 숫자 유무로는 보지 않는다 - "N.D." / "불검출" / 빈 칸인 첫 데이터 행이 사라지므로
+def _is_header(values, columns=BATCH_COLUMNS):
+    names = HEADER_NAMES | {_header_key(c) for c in columns}
+    return any(_header_key(v) in names for v in list(values)[:3])
+
+def _too_few_columns(n, columns):
+    return ValueError(f"컬럼이 {n}개뿐입니다. {', '.join(columns[:3])} 순으로 최소 3개 컬럼이 필요합니다.")
+
+def _size(fp):
+    pos = fp.tell(); fp.seek(0, os.SEEK_END); size = fp.tell(); fp.seek(pos)
+    return size
+
+# CSV/TSV 앞부분 -> (인코딩, 구분자, 헤더 행 수, 읽을 컬럼 수)
+# columns: 앞 3개(식품/원물, 농약, 검출량)는 필수, 나머지는 선택 - 앞부분에서 가장 긴 행 기준으로 읽고 없는 칸은 빈 값
+def _csv_layout(head, columns):
+    enc, sep = sniff_bytes(head, full=len(head) < SNIFF_BYTES)
+    lines = head.decode(enc, errors='ignore').lstrip('\ufeff').splitlines()
+    skip = 1 if lines and _is_header(lines[0].split(sep), columns) else 0
+    rows = [line for line in lines[skip:] if line.strip()] # 헤더 행은 빼고 데이터 행 기준
+    width = max([0] + [line.count(sep) + 1 for line in rows])
+    if rows and width < 3: raise _too_few_columns(width, columns)
+    return enc, sep, skip, min(len(columns), max(3, width))
+
+def _read_csv(src, layout, columns, **kwargs):
+    enc, sep, skip, n = layout
+    return pd.read_csv(src, sep=sep, encoding=enc, header=None, names=columns[:n], usecols=range(n),
+                       skiprows=skip, dtype=str, keep_default_na=False, **kwargs)
+
+def _fill(chunk, columns):
+    for col in columns[len(chunk.columns):]: chunk[col] = ''
+    return chunk
+
+# CSV/TSV: 앞부분으로 인코딩/구분자 판별 후 C 엔진으로 chunk 단위 파싱 -> (DataFrame, 진행률)
+def iter_csv_frames(fp, chunk_rows=CHUNK_ROWS, columns=BATCH_COLUMNS):
+    size = _size(fp) or 1
+    head = fp.read(SNIFF_BYTES); fp.seek(0)
+    for chunk in _read_csv(fp, _csv_layout(head, columns), columns, chunksize=chunk_rows):
+        yield _fill(chunk, columns), min(fp.tell() / size, 1.0)
+
+# 큰 CSV/TSV 를 shard_bytes 단위 바이트 범위로 나눈다 -> (layout, [(start, end), ...]) 또는 None (나누지 않음)
+# 행은 첫 바이트가 속한 범위가 맡는다. 따옴표가 있으면 칸 안 줄바꿈이 있을 수 있어 나누지 않는다
+def plan_csv_shards(path, shard_bytes=SHARD_BYTES, columns=BATCH_COLUMNS):
+    size = os.path.getsize(path)
+    if str(path).lower().endswith('.xlsx') or size < 2 * shard_bytes: return None
+    with open(path, 'rb') as fp: head = fp.read(SNIFF_BYTES)
+    if b'"' in head: return None
+    return _csv_layout(head, columns), [(s, min(s + shard_bytes, size)) for s in range(0, size, shard_bytes)]
+
+# 바이트 범위 하나만 읽어 DataFrame 으로 (judge_cli 워커가 파일을 직접 읽는다)
+def read_csv_shard(path, start, end, layout, columns=BATCH_COLUMNS):
+    with open(path, 'rb') as fp:
+        if start: fp.seek(start - 1); fp.readline() # 앞 범위에서 시작한 행은 건너뜀
+        data = fp.read(max(end - fp.tell(), 0))
+        if data and not data.endswith(b'\n'): data += fp.readline() # 범위 안에서 시작한 마지막 행은 끝까지
+    if not data.strip(): return pd.DataFrame(columns=columns)
+    if start: layout = layout[:2] + (0,) + layout[3:] # 헤더 행은 첫 범위에만
+    return _fill(_read_csv(io.BytesIO(data), layout, columns), columns)
+
+# XLSX: openpyxl read_only 모드로 행을 흘려 읽으며 chunk_rows 씩 묶는다
+def iter_xlsx_frames(fp, chunk_rows=CHUNK_ROWS, columns=BATCH_COLUMNS):
+    from openpyxl import load_workbook
+    wb = load_workbook(fp, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = ws.max_row or 0
+        if total and (ws.max_column or 0) < 3: raise _too_few_columns(ws.max_column or 0, columns)
+        buf, done = [], 0
+        for i, row in enumerate(ws.iter_rows(values_only=True)):
+            vals = (list(row) + [None] * len(columns))[:len(columns)]
+            if i == 0 and _is_header(vals, columns): continue
+            if all(v is None for v in vals): continue
+            buf.append(['' if v is None else v for v in vals])
+            if len(buf) >= chunk_rows:
+                done += len(buf)
+                yield pd.DataFrame(buf, columns=columns), (min(done / total, 1.0) if total else 0.0)
+                buf = []
+        if buf: yield pd.DataFrame(buf, columns=columns), 1.0
+    finally: wb.close()
+
+# 파일 이름(확장자)에 맞는 chunk 리더 선택. fp는 바이너리 파일 객체 (st.file_uploader 결과 포함)
+def iter_batch_frames(fp, filename, chunk_rows=CHUNK_ROWS, columns=BATCH_COLUMNS):
+    if isinstance(fp, (bytes, bytearray)): fp = io.BytesIO(fp)
+    if str(filename).lower().endswith('.xlsx'): return iter_xlsx_frames(fp, chunk_rows, columns)
+    return iter_csv_frames(fp, chunk_rows, columns)
+
+# chunk 별 판정 스트림 -> (판정 결과, 부적합 행, 진행률)
+def judge_stream(index, frames):
+    for chunk, progress in frames:
+        res = judge_batch(index, chunk)
+        yield res, res[res['판정'] == FAIL_LABEL], progress
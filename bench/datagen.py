@@ -0,0 +1,124 @@
+"""벤치마크용 합성 데이터 생성기.
+
+- 기준표: data.csv 의 농약 x 식품 구조(밀도, 기준값 분포)를 그대로 유지하면서 배수로 확장
+- 일괄 판정 입력: "0.5T", "0.02 ppm", "N.D." 같은 지저분한 검출량, 영문명/부분명/미등록 농약 포함
+- history.db: 1만~1천만 행 대장 (init_db 스키마/트리거 그대로)
+
+    python -m bench.datagen regulation --scale 4 --out /tmp/reg.csv
+    python -m bench.datagen batch --rows 100000 --out /tmp/batch.tsv
+    python -m bench.datagen history --rows 1000000 --out /tmp/history.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+import history_db
+from pest_names import load_aliases
+from reg_loader import parse_regulation_csv
+
+SOURCE_CSV = os.path.join(ROOT, 'data.csv')
+ALIAS_CSV = os.path.join(ROOT, 'pesticide_aliases.csv')
+DIRTY_SUFFIXES = ['', '', '', 'T', ' ppm', ' mg/kg', '*']
+DIRTY_VALUES = ['N.D.', '', '-', '불검출']
+DEPTS = ['품질팀', '원료팀', '생산1팀', '생산2팀', '구매팀', '연구소', '-']
+
+
+def _source():
+    return parse_regulation_csv(SOURCE_CSV)
+
+# data.csv 구조를 scale 배로 확장한 기준표 (농약명/식품명에 #k 접미사로 복제)
+def make_regulation_table(scale=1, seed=0):
+    src = _source()
+    rng = np.random.default_rng(seed)
+    foods = src['food_type'].astype(str).unique()
+    pests = src['pesticide_name'].astype(str).unique()
+    density = len(src) / (len(foods) * len(pests))
+    limits = src['limit'].to_numpy()
+    if scale <= 1: return src[['pesticide_name', 'food_type', 'limit_mg_kg']].astype(str)
+    n_p, n_f = int(len(pests) * scale ** 0.5), int(len(foods) * scale ** 0.5)
+    p_names = [p if k == 0 else f"{p}#{k}" for k in range(-(-n_p // len(pests))) for p in pests][:n_p]
+    f_names = [f if k == 0 else f"{f}#{k}" for k in range(-(-n_f // len(foods))) for f in foods][:n_f]
+    rows = []
+    for p in p_names:
+        picked = rng.choice(n_f, size=max(1, rng.binomial(n_f, density)), replace=False)
+        for fi, l in zip(picked, rng.choice(limits, size=len(picked))):
+            rows.append((p, f_names[fi], f"{l:g}"))
+    return pd.DataFrame(rows, columns=['pesticide_name', 'food_type', 'limit_mg_kg'])
+
+# 일괄 판정 입력 (식품, 농약, 검출량)
+# hit_ratio: 기준표에 있는 조합 비율, alias_ratio: 영문명/CAS, fuzzy_ratio: 부분명/오타, dirty_ratio: 지저분한 검출량
+def make_batch(reg_df, rows, hit_ratio=0.3, alias_ratio=0.05, fuzzy_ratio=0.05, dirty_ratio=0.3, seed=0):
+    rnd = random.Random(seed)
+    pairs = list(zip(reg_df['food_type'].astype(str), reg_df['pesticide_name'].astype(str)))
+    foods = sorted(set(f for f, _ in pairs)); pests = sorted(set(p for _, p in pairs))
+    aliases = [a for a, p in load_aliases(ALIAS_CSV).items() if p in set(pests)] or pests
+    out = []
+    for _ in range(rows):
+        r = rnd.random()
+        if r < hit_ratio: f, p = rnd.choice(pairs)
+        else: f, p = rnd.choice(foods), rnd.choice(pests)
+        r = rnd.random()
+        if r < alias_ratio: p = rnd.choice(aliases)
+        elif r < alias_ratio + fuzzy_ratio: p = p[:max(2, len(p) - 1)] # 끝 글자 누락
+        amt = round(10 ** rnd.uniform(-3, 1), 4)
+        v = (rnd.choice(DIRTY_VALUES) if rnd.random() < 0.2 else f"{amt}{rnd.choice(DIRTY_SUFFIXES)}") if rnd.random() < dirty_ratio else str(amt)
+        out.append((f, p, v))
+    return pd.DataFrame(out, columns=['식품', '농약', '검출량'])
+
+# 대장 DB 채우기 (1년치 날짜 분산), chunk 단위 executemany
+def make_history_db(path, rows, seed=0, chunk=100_000):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    old = history_db.DB_FILE
+    history_db.DB_FILE = path
+    try: history_db.init_db()
+    finally: history_db.DB_FILE = old
+    src = _source()
+    foods = src['food_type'].astype(str).unique().tolist(); pests = src['pesticide_name'].astype(str).unique().tolist()
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    done = 0
+    while done < rows:
+        n = min(chunk, rows - done)
+        batch = []
+        for _ in range(n):
+            ts = (start + timedelta(minutes=rnd.randrange(365 * 24 * 60))).strftime("%Y-%m-%d %H:%M")
+            limit = rnd.choice([0.01, 0.05, 0.1, 0.5, 1.0, 2.0]); amt = round(limit * rnd.uniform(1.01, 20), 4)
+            batch.append((ts, rnd.choice(DEPTS), rnd.choice(foods), rnd.choice(pests), amt, limit, round(amt - limit, 4),
+                          "부적합", "폐기", rnd.choice(["식약처 고시", "PLS (0.01)"]), "일괄"))
+        with conn: conn.executemany(history_db.INSERT_SQL, batch)
+        done += n
+    conn.close()
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="벤치마크용 합성 데이터 생성")
+    sub = ap.add_subparsers(dest='kind', required=True)
+    r = sub.add_parser('regulation'); r.add_argument('--scale', type=float, default=1.0)
+    b = sub.add_parser('batch'); b.add_argument('--rows', type=int, default=10_000); b.add_argument('--scale', type=float, default=1.0)
+    h = sub.add_parser('history'); h.add_argument('--rows', type=int, default=10_000)
+    for p in (r, b, h):
+        p.add_argument('--out', required=True); p.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args(argv)
+    if args.kind == 'regulation':
+        make_regulation_table(args.scale, args.seed).to_csv(args.out, sep='\t', index=False)
+    elif args.kind == 'batch':
+        make_batch(make_regulation_table(args.scale, args.seed), args.rows, seed=args.seed).to_csv(args.out, sep='\t', index=False, header=False)
+    else:
+        make_history_db(args.out, args.rows, args.seed)
+    print(args.out)
+
+if __name__ == '__main__':
+    main()
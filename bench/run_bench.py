@@ -0,0 +1,248 @@
+"""판정/기준조회/대장 경로 벤치마크.
+
+각 경로의 처리량(ops/s), 지연 백분위(p50/p95/p99 ms), 최대 메모리(tracemalloc, 별도 1회 측정)를
+JSON 으로 남기고 저장된 기준선(bench/baseline.json)과 비교한다.
+
+    python -m bench.run_bench                       # quick 프로파일, 기준선과 비교
+    python -m bench.run_bench --profile full        # 대장 1천만 행까지
+    python -m bench.run_bench --save-baseline       # 현재 결과를 기준선으로 저장
+    python -m bench.run_bench --fail-on-regression  # 회귀가 있으면 종료 코드 1 (같은 머신의 기준선일 때만)
+
+기준선은 측정한 머신에 묶인 값이라 다른 머신의 결과와 비교하면 배율은 참고용이다.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+import history_db
+import reg_loader
+import reg_version
+from bench.datagen import ALIAS_CSV, make_batch, make_history_db, make_regulation_table
+from pest_names import load_aliases
+from verdict import FAIL_LABEL, LimitIndex, clean_amounts, get_limit_info, judge_batch
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+REGRESSION_RATIO = 1.25 # 기준선 대비 25% 이상 느려지면 회귀로 표시
+REGRESSION_MIN_MS = 1.0 # 단, 차이가 1ms 미만이면 측정 오차로 본다
+# 두 측정의 흩어짐 (p95 - p50) / p50 을 더한 것보다 작은 차이도 잡음으로 본다 (반복 수가 적거나 흔들리는 항목)
+
+PROFILES = {
+    'quick': {'reg_scales': [1, 4], 'lookups': 20_000, 'batch_rows': [10_000, 100_000], 'single_saves': 200,
+              'concurrent_saves': (8, 50), 'bulk_rows': [10_000], 'history_rows': [10_000, 100_000],
+              'rejudge': ([100_000], 500)},
+    'full': {'reg_scales': [1, 4, 16], 'lookups': 200_000, 'batch_rows': [10_000, 100_000, 1_000_000], 'single_saves': 1_000,
+             'concurrent_saves': (32, 100), 'bulk_rows': [10_000, 100_000], 'history_rows': [10_000, 100_000, 1_000_000, 10_000_000],
+             'rejudge': ([1_000_000, 10_000_000], 500)},
+}
+
+
+def _percentiles(samples_ms):
+    if len(samples_ms) < 2: return {'p50': samples_ms[0] if samples_ms else None, 'p95': None, 'p99': None}
+    q = statistics.quantiles(samples_ms, n=100, method='inclusive')
+    return {'p50': round(q[49], 4), 'p95': round(q[94], 4), 'p99': round(q[98], 4)}
+
+# Python 힙 최대 사용량 (SQLite 내부 할당은 잡히지 않는다)
+def _peak_mb(fn):
+    tracemalloc.start()
+    try: fn(); return round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    finally: tracemalloc.stop()
+
+# fn 을 repeat 번 실행해 지연 분포 측정, ops = 1회 실행당 처리 단위 수 (행 수 등)
+def measure(name, fn, ops=1, repeat=5, memory=True, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup: setup()
+        t = time.perf_counter(); fn(); samples.append((time.perf_counter() - t) * 1000)
+    if memory and setup: setup()
+    best = min(samples)
+    return {'name': name, 'ops': ops, 'repeat': repeat, 'mean_ms': round(statistics.fmean(samples), 4),
+            'ops_per_sec': round(ops / (best / 1000)) if best else None, **_percentiles(samples),
+            'peak_mb': _peak_mb(fn) if memory else None}
+
+
+def bench_load(tmp, scales):
+    out = []
+    for scale in scales:
+        path = os.path.join(tmp, f'reg_x{scale}.csv')
+        make_regulation_table(scale).to_csv(path, sep='\t', index=False)
+        out.append(measure(f'load.parse_csv[x{scale}]', lambda: reg_loader.parse_regulation_csv(path), repeat=10))
+        reg_loader.load_regulation_table(path)
+        out.append(measure(f'load.snapshot[x{scale}]', lambda: reg_loader.load_regulation_table(path), repeat=20))
+    return out
+
+def bench_lookup(index, reg, n):
+    batch = make_batch(reg, n, seed=1)
+    pairs = list(zip(batch['식품'], batch['농약']))
+    # 1회 호출 지연 분포 (캐시 예열 후)
+    for f, p in pairs: get_limit_info(index, f, p)
+    samples = []
+    for f, p in pairs:
+        t = time.perf_counter(); get_limit_info(index, f, p); samples.append((time.perf_counter() - t) * 1000)
+    total = sum(samples)
+    def lookup_all():
+        for f, p in pairs: get_limit_info(index, f, p)
+    return [{'name': f'lookup.get_limit_info[{n}]', 'ops': n, 'repeat': 1, 'mean_ms': round(total / n, 6),
+             'ops_per_sec': round(n / (total / 1000)), **_percentiles(samples), 'peak_mb': _peak_mb(lookup_all)},
+            measure('lookup.build_index', lambda: LimitIndex(reg, load_aliases(ALIAS_CSV)), repeat=3)]
+
+def bench_batch(index, reg, sizes):
+    out = []
+    for n in sizes:
+        bdf = make_batch(reg, n, seed=2)
+        out.append(measure(f'batch.judge[{n}]', lambda: judge_batch(index, bdf), ops=n, repeat=10 if n <= 10_000 else 3))
+    return out
+
+def bench_saves(tmp, index, reg, singles, bulk_sizes, concurrent=(8, 50)):
+    history_db.DB_FILE = os.path.join(tmp, 'save.db')
+    history_db.init_db()
+    save_one = lambda: history_db.save_to_db('벤치', '가지', '가스가마이신', 0.5, 0.3, '폐기', '식약처 고시', '정밀')
+    samples = []
+    for _ in range(singles):
+        t = time.perf_counter(); save_one(); samples.append((time.perf_counter() - t) * 1000)
+    def save_some():
+        for _ in range(20): save_one()
+    out = [{'name': 'save.single', 'ops': singles, 'repeat': 1, 'mean_ms': round(statistics.fmean(samples), 4),
+            'ops_per_sec': round(singles / (sum(samples) / 1000)), **_percentiles(samples), 'peak_mb': _peak_mb(save_some)}]
+    # 동시 단건 저장: threads 개 스레드가 각각 per_thread 번 저장 (writer 가 쌓인 요청을 묶어 커밋)
+    threads, per_thread = concurrent
+    def user(_):
+        lat = []
+        for _ in range(per_thread):
+            t = time.perf_counter()
+            history_db.save_to_db('벤치', '가지', '가스가마이신', 0.5, 0.3, '폐기', '식약처 고시', '동시')
+            lat.append((time.perf_counter() - t) * 1000)
+        return lat
+    def users():
+        with ThreadPoolExecutor(threads) as pool: return [ms for lat in pool.map(user, range(threads)) for ms in lat]
+    t = time.perf_counter(); samples = users(); wall = time.perf_counter() - t
+    out.append({'name': f'save.concurrent[{threads}x{per_thread}]', 'ops': len(samples), 'repeat': 1,
+                'mean_ms': round(statistics.fmean(samples), 4), 'ops_per_sec': round(len(samples) / wall),
+                **_percentiles(samples), 'peak_mb': _peak_mb(users)}) # tracemalloc 은 모든 스레드(writer 포함)를 잡는다
+    for n in bulk_sizes:
+        res = judge_batch(index, make_batch(reg, n * 3, seed=3))
+        bad = res[res['판정'] == FAIL_LABEL].head(n)
+        out.append(measure(f'save.bulk[{len(bad)}]', lambda: history_db.save_many_to_db('벤치', bad, '폐기', '일괄'),
+                           ops=len(bad), repeat=3))
+    return out
+
+def bench_history(tmp, sizes):
+    out = []
+    for n in sizes:
+        history_db.DB_FILE = make_history_db(os.path.join(tmp, f'hist_{n}.db'), n)
+        flt = {'dept': '품질팀', 'date_from': '2024-03-01', 'date_to': '2024-03-31'}
+        out.append(measure(f'history.version[{n}]', history_db.history_version, repeat=30))
+        out.append(measure(f'history.summary[{n}]', history_db.load_summary, repeat=30))
+        out.append(measure(f'history.page[{n}]', lambda: history_db.load_history_page(None, 1, 100), repeat=30))
+        out.append(measure(f'history.page_filtered[{n}]', lambda: history_db.load_history_page(flt, 1, 100), repeat=30))
+        out.append(measure(f'history.count_filtered[{n}]', lambda: history_db.count_history(flt), repeat=30))
+        if n <= 1_000_000: # 예전 방식(SELECT * 전체 로드) 비교용
+            out.append(measure(f'history.full_load[{n}]', history_db.load_history_db, ops=n, repeat=3))
+    return out
+
+# 기준 개정 반영: changes 개 (식품, 농약) 기준을 바꾼 표와 원래 표를 번갈아 적용 (매번 changes 쌍 재판정)
+def bench_rejudge(tmp, reg, sizes, changes):
+    out = []
+    base = LimitIndex(reg, load_aliases(ALIAS_CSV))
+    mod = reg.copy()
+    pick = mod.sample(changes, random_state=4).index
+    mod.loc[pick, 'limit_mg_kg'] = (clean_amounts(mod.loc[pick, 'limit_mg_kg']) * 2 + 0.01).map(str)
+    indexes = [LimitIndex(mod, load_aliases(ALIAS_CSV)), base]
+    out.append(measure(f'regulation.diff[{changes}]', lambda: reg_version.diff_limits(base.frame, indexes[0].frame), repeat=5))
+    for n in sizes:
+        history_db.DB_FILE = make_history_db(os.path.join(tmp, f'rejudge_{n}.db'), n)
+        reg_version.sync_history(base) # 적용 기준표 초기화
+        turn = iter(range(1_000_000))
+        # 메모리 측정도 한 번 더 번갈아 적용하는 것이라 반복 수와 관계없이 매번 changes 쌍이 바뀐다
+        out.append(measure(f'regulation.sync[{n}]', lambda: reg_version.sync_history(indexes[next(turn) % 2]),
+                           ops=changes, repeat=4))
+    return out
+
+
+def run(profile='quick', only=None):
+    cfg = PROFILES[profile]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        reg = make_regulation_table(1)
+        index = LimitIndex(reg, load_aliases(ALIAS_CSV))
+        groups = {
+            'load': lambda: bench_load(tmp, cfg['reg_scales']),
+            'lookup': lambda: bench_lookup(index, reg, cfg['lookups']),
+            'batch': lambda: bench_batch(index, reg, cfg['batch_rows']),
+            'save': lambda: bench_saves(tmp, index, reg, cfg['single_saves'], cfg['bulk_rows'], cfg['concurrent_saves']),
+            'history': lambda: bench_history(tmp, cfg['history_rows']),
+            'regulation': lambda: bench_rejudge(tmp, reg, *cfg['rejudge']),
+        }
+        old_db = history_db.DB_FILE
+        try:
+            for g, fn in groups.items():
+                if only and g not in only: continue
+                print(f"[{g}]", file=sys.stderr)
+                results.extend(fn())
+        finally: history_db.DB_FILE = old_db
+    return {'profile': profile, 'python': platform.python_version(), 'machine': platform.machine(),
+            'created': time.strftime('%Y-%m-%d %H:%M'), 'results': results}
+
+# 측정 흩어짐 (p95 - p50) / p50, 반복이 1번이거나 값이 없으면 0
+def _spread(r):
+    return (r['p95'] - r['p50']) / r['p50'] if r.get('p50') and r.get('p95') else 0.0
+
+# 같은 이름의 항목끼리 p50(없으면 평균) 비교 -> (이름, 기준선, 현재, 비율, 회귀 여부)
+def compare(report, baseline):
+    key = lambda r: r.get('p50') or r.get('mean_ms')
+    base = {r['name']: r for r in baseline.get('results', [])}
+    rows = []
+    for r in report['results']:
+        b = base.get(r['name'])
+        if not b or not key(b) or not key(r): continue
+        ratio = key(r) / key(b)
+        limit = max(REGRESSION_RATIO, 1 + _spread(b) + _spread(r))
+        rows.append((r['name'], key(b), key(r), round(ratio, 2),
+                     ratio >= limit and key(r) - key(b) >= REGRESSION_MIN_MS))
+    return rows
+
+def print_report(report, cmp_rows):
+    print(f"{'name':40} {'ops/s':>12} {'mean ms':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'peak MB':>8}")
+    for r in report['results']:
+        fmt = lambda v: '-' if v is None else f"{v:.3f}" if isinstance(v, float) else str(v)
+        print(f"{r['name']:40} {fmt(r['ops_per_sec']):>12} {fmt(r['mean_ms']):>10} {fmt(r['p50']):>9} "
+              f"{fmt(r['p95']):>9} {fmt(r['p99']):>9} {fmt(r['peak_mb']):>8}")
+    if cmp_rows:
+        print("\nvs baseline (p50 ms)")
+        for name, b, c, ratio, bad in cmp_rows:
+            print(f"{name:40} {b:>10.3f} -> {c:>10.3f}  x{ratio:<5} {'REGRESSION' if bad else ''}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="판정/조회/대장 경로 벤치마크")
+    ap.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    ap.add_argument('--only', nargs='*', choices=['load', 'lookup', 'batch', 'save', 'history', 'regulation'])
+    ap.add_argument('--baseline', default=BASELINE_FILE)
+    ap.add_argument('--save-baseline', action='store_true')
+    ap.add_argument('--json', help="결과 JSON 저장 경로")
+    ap.add_argument('--fail-on-regression', action='store_true', help="회귀가 있으면 종료 코드 1")
+    args = ap.parse_args(argv)
+
+    report = run(args.profile, args.only)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as fp: baseline = json.load(fp)
+    cmp_rows = compare(report, baseline)
+    print_report(report, cmp_rows)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fp: json.dump(report, fp, ensure_ascii=False, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fp: json.dump(report, fp, ensure_ascii=False, indent=1)
+    return 1 if args.fail_on_regression and any(bad for *_, bad in cmp_rows) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from verdict import FAIL_LABEL, MFDS_STANDARD, PASS_LABEL, PLS_LIMIT, PLS_STANDARD, RESULT_COLUMNS, clean_amounts
+
+COMPOSITE_STANDARD = "가중평균"
+CACHE_MAX = 256
+
+
+# 배합표(원료명, 배합비율(%)) -> (원료 튜플, 비율 튜플[0~1]) : 캐시 키 겸 계산 입력
+def recipe_key(recipe):
+    foods = tuple(None if pd.isna(f) else str(f).strip() for f in recipe['원료명'])
+    ratios = tuple(float(r) / 100.0 if pd.notna(r) else 0.0 for r in pd.to_numeric(recipe['배합비율(%)'], errors='coerce'))
+    return foods, ratios
+
+
+class CompositeEngine:
+    """복합원재료 가중평균 기준 엔진.
+
+    기준표를 식품 x 농약 행렬(기준 없는 칸은 NaN)로 한 번 펼쳐 두고, 배합표가 오면
+    원료 x 농약 행렬(NaN -> PLS 0.01)과 배합비율의 내적으로 모든 농약의 가중평균 기준을 한 번에 계산한다.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.pests = list(index.names)
+        fr = index.frame
+        self._wide = fr.pivot(index='food_type', columns='pesticide_name', values='limit').reindex(columns=self.pests)
+        self._cache = {}
+
+    def matrix(self, foods):
+        """원료 x 농약 기준 행렬 (PLS 채움) 과 식약처 고시 여부 마스크"""
+        raw = self._wide.reindex(list(foods)).to_numpy()
+        hit = ~np.isnan(raw)
+        return np.where(hit, raw, PLS_LIMIT), hit
+
+    def limits(self, recipe):
+        """기준표 전체 농약의 가중평균 기준 Series (배합표별 캐시)"""
+        key = recipe_key(recipe)
+        if key not in self._cache:
+            if len(self._cache) >= CACHE_MAX: self._cache.clear()
+            foods, ratios = key
+            m, _ = self.matrix(foods)
+            self._cache[key] = pd.Series(np.asarray(ratios) @ m if foods else np.zeros(len(self.pests)),
+                                         index=self.pests, name='기준')
+        return self._cache[key]
+
+    def pls_limit(self, recipe):
+        """기준표에 없는 농약: 모든 원료가 PLS 0.01 인 경우의 가중평균"""
+        return PLS_LIMIT * sum(recipe_key(recipe)[1])
+
+    def limit_of(self, recipe, pest_input):
+        pest = self.index.resolve_pest(pest_input)
+        lim = self.limits(recipe)
+        return pest, float(lim[pest]) if pest in lim.index else self.pls_limit(recipe)
+
+    def breakdown(self, recipe, pest_input):
+        """한 농약의 원료별 기여도 (원료명, 배합비율(%), 기준, 구분, 기여도)"""
+        foods, ratios = recipe_key(recipe)
+        pest = self.index.resolve_pest(pest_input)
+        rows = []
+        for f, r in zip(foods, ratios):
+            l = self.index.limits.get((f, pest))
+            std = MFDS_STANDARD if l is not None else PLS_STANDARD
+            l = PLS_LIMIT if l is None else l
+            rows.append((f, r * 100.0, l, std, l * r))
+        return pest, pd.DataFrame(rows, columns=['원료명', '배합비율(%)', '기준', '구분', '기여도'])
+
+    def judge(self, recipe, sheet, product=""):
+        """다성분 결과표(농약, 검출량) 전체를 한 번에 판정 -> judge_batch 와 같은 RESULT_COLUMNS"""
+        lim = self.limits(recipe)
+        names = sheet['농약'].map(str).str.strip()
+        resolved = names.map({p: self.index.resolve_pest(p) for p in names.unique()})
+        out = pd.DataFrame({'식품': product, '농약': resolved.to_numpy(),
+                            '검출량': clean_amounts(sheet['검출량']).to_numpy()})
+        out['기준'] = resolved.map(lim).fillna(self.pls_limit(recipe)).to_numpy()
+        out['구분'] = COMPOSITE_STANDARD
+        out['판정'] = np.where(out['검출량'].to_numpy() > out['기준'].to_numpy(), FAIL_LABEL, PASS_LABEL)
+        return out[RESULT_COLUMNS]
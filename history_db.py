@@ -0,0 +1,359 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import repeat
+
+import pandas as pd
+
+DB_FILE = "history.db"
+FILTER_COLUMNS = {'dept': '의뢰부서', 'food': '식품명', 'pest': '농약명'}
+INSERT_SQL = "INSERT INTO history (검사일자, 의뢰부서, 식품명, 농약명, 검출량, 허용기준, 초과량, 판정, 조치내용, 적용기준, 비고) VALUES (?,?,?,?,?,?,?,?,?,?,?)"
+READ_POOL_SIZE = 8 # DB 파일당 재사용하는 읽기 연결 수
+WRITE_GROUP_ROWS = 20_000 # writer 가 한 트랜잭션에 묶는 행 수 상한 (요청 하나가 더 크면 단독 처리)
+WRITE_RETRIES = 5 # 다른 프로세스가 잠금을 쥐고 있을 때 재시도 횟수
+WRITE_BACKOFF = 0.05 # 첫 재시도 대기(초), 매번 2배 (최대 2초)
+WRITE_TIMEOUT = 5
+WRITE_WAIT = 300 # 쓰기 요청 결과를 기다리는 최대 시간(초), 넘으면 TimeoutError
+
+
+# 모든 연결은 여기서: WAL 모드 + synchronous=NORMAL (커밋마다 fsync 하지 않음)
+def _connect(path=None, timeout=30, **kwargs):
+    conn = sqlite3.connect(path or DB_FILE, timeout=timeout, **kwargs)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+# --- 읽기: DB 파일별 연결 풀 ---
+# WAL 이라 읽기는 쓰기를 막지 않는다. 조회마다 연결을 새로 열지 않고 빌려 쓰고 돌려준다
+_read_pools = {}
+
+@contextmanager
+def _reader():
+    path = os.path.abspath(DB_FILE)
+    pool = _read_pools.setdefault(path, queue.LifoQueue(READ_POOL_SIZE))
+    try: conn = pool.get_nowait()
+    except queue.Empty: conn = _connect(path, check_same_thread=False)
+    try: yield conn
+    except BaseException: conn.close(); raise
+    else:
+        try: pool.put_nowait(conn)
+        except queue.Full: conn.close()
+
+# --- 쓰기: DB 파일별 백그라운드 writer 스레드 하나 ---
+# 추가/삭제/초기화 요청은 큐에 넣고 Future 로 완료를 받는다. writer 는 쌓여 있는 요청을 모아
+# 한 트랜잭션으로 커밋하고(요청마다 SAVEPOINT 라 한 요청의 오류가 다른 요청에 번지지 않음),
+# 다른 프로세스(judge_cli 등)가 잠금을 쥐고 있으면 backoff 하며 재시도한다.
+def _busy(e):
+    return isinstance(e, sqlite3.OperationalError) and ('locked' in str(e) or 'busy' in str(e))
+
+def _apply_insert(conn, rows):
+    conn.executemany(INSERT_SQL, rows)
+    return len(rows)
+
+def _apply_delete(conn, ids):
+    return conn.execute(f"DELETE FROM history WHERE id IN ({','.join(['?']*len(ids))})", list(ids)).rowcount
+
+def _apply_clear(conn, _):
+    n = conn.execute("DELETE FROM history").rowcount
+    for table in SUMMARY_TABLES: conn.execute(f"DELETE FROM {table}")
+    return n
+
+# 기준 개정분 반영: 적용 기준표(reg_applied) 갱신 + 해당 (식품명, 농약명) 행만 재판정 + 개정 이력 1건
+# 같은 트랜잭션이라 대장과 적용 기준표가 어긋난 채로 남지 않는다
+# 적합으로 바뀐 행은 조치내용을 '-' 로 비우고 원래 조치는 비고에 남긴다 (집계 테이블에서는 트리거가 뺀다)
+REJUDGE_SQL = """UPDATE history SET 허용기준 = :lim, 적용기준 = :std,
+    초과량 = CASE WHEN 검출량 > :lim THEN ROUND(검출량 - :lim, 4) ELSE 0.0 END,
+    판정 = CASE WHEN 검출량 > :lim THEN '부적합' ELSE '적합' END,
+    조치내용 = CASE WHEN 검출량 > :lim THEN 조치내용 ELSE '-' END,
+    비고 = COALESCE(비고, '') || ' [기준개정 ' || :day || ': ' || 허용기준 || '→' || :lim
+        || CASE WHEN 검출량 <= :lim AND 조치내용 IS NOT '-' THEN ', 조치 해제(' || 조치내용 || ')' ELSE '' END || ']'
+    WHERE 식품명 = :food AND 농약명 = :pest AND 적용기준 IN (:std_a, :std_b) AND 허용기준 IS NOT :lim"""
+
+def _apply_regulation(conn, p):
+    rows = p['changes']
+    conn.executemany("DELETE FROM reg_applied WHERE food_type = ? AND pesticide_name = ?", [(f, s) for f, s, l, *_ in rows if l is None])
+    conn.executemany("INSERT OR REPLACE INTO reg_applied (food_type, pesticide_name, limit_mg_kg) VALUES (?,?,?)",
+                     [(f, s, l) for f, s, l, *_ in rows if l is not None])
+    n = 0
+    if p['rejudge']:
+        day = datetime.now().strftime("%Y-%m-%d")
+        std_a, std_b = p['standards']
+        n = conn.executemany(REJUDGE_SQL, [{'food': f, 'pest': s, 'lim': e, 'std': std, 'day': day, 'std_a': std_a, 'std_b': std_b}
+                                           for f, s, _, e, std in rows]).rowcount
+    conn.execute("INSERT INTO reg_revisions (applied_at, source, changed, rejudged) VALUES (?,?,?,?)",
+                 (datetime.now().strftime("%Y-%m-%d %H:%M"), p['source'], len(rows), n))
+    return n
+
+WRITE_OPS = {'insert': _apply_insert, 'delete': _apply_delete, 'clear': _apply_clear, 'regulation': _apply_regulation}
+
+
+class _Writer(threading.Thread):
+    def __init__(self, path):
+        super().__init__(name=f"history-writer:{os.path.basename(path)}", daemon=True)
+        self.path = path
+        self.jobs = queue.Queue()
+        self.failed = False # 연결/루프가 죽으면 True -> submit_write 가 새 writer 를 띄운다
+
+    def submit(self, op, payload):
+        fut = Future()
+        self.jobs.put((WRITE_OPS[op], payload, len(payload) if op == 'insert' else 1, fut))
+        return fut
+
+    def stop(self):
+        self.jobs.put(None); self.join()
+
+    def run(self):
+        group = []
+        try:
+            conn = _connect(self.path, timeout=WRITE_TIMEOUT, isolation_level=None)
+            try:
+                while True:
+                    group, rows, job = [], 0, self.jobs.get()
+                    while job is not None:
+                        if job[3].set_running_or_notify_cancel(): group.append(job); rows += job[2]
+                        if rows >= WRITE_GROUP_ROWS: break
+                        try: job = self.jobs.get_nowait()
+                        except queue.Empty: break
+                    if group: self._commit(conn, group); group = []
+                    if job is None: break
+            finally: conn.close()
+        except BaseException as e:
+            self._fail(group, e)
+            if not isinstance(e, Exception): raise
+
+    # 연결 실패/루프 오류: 처리 중이던 묶음과 큐에 남은 요청을 모두 예외로 끝낸다 (result() 가 멈추지 않게)
+    def _fail(self, group, exc):
+        with _writers_lock:
+            self.failed = True # 잠금 안에서 표시 -> 이후 요청은 이 큐에 들어오지 않는다
+            if _writers.get(self.path) is self: del _writers[self.path]
+        futs = [job[3] for job in group]
+        while True:
+            try: job = self.jobs.get_nowait()
+            except queue.Empty: break
+            if job is not None: futs.append(job[3])
+        for fut in futs:
+            if not fut.done(): fut.set_exception(exc)
+
+    def _commit(self, conn, group):
+        for attempt in range(WRITE_RETRIES + 1):
+            results = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for apply, payload, _, fut in group:
+                    conn.execute("SAVEPOINT job")
+                    try: results.append((fut, apply(conn, payload), None))
+                    except Exception as e:
+                        if _busy(e): raise
+                        conn.execute("ROLLBACK TO job"); results.append((fut, None, e))
+                    conn.execute("RELEASE job")
+                conn.execute("UPDATE write_seq SET seq = seq + 1") # 조회 캐시 키 (history_version)
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction: conn.execute("ROLLBACK")
+                if _busy(e) and attempt < WRITE_RETRIES:
+                    time.sleep(min(WRITE_BACKOFF * 2 ** attempt, 2.0)); continue
+                for *_, fut in group: fut.set_exception(e)
+                return
+            for fut, res, err in results:
+                if err is None: fut.set_result(res)
+                else: fut.set_exception(err)
+            return
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+# 쓰기 요청 제출 -> Future (result() 는 처리 행 수). op: 'insert'(행 튜플 목록) / 'delete'(id 목록) / 'clear'
+# writer 가 죽어 있으면 새로 띄운다 (기다리던 요청은 죽을 때 예외로 끝났다)
+def submit_write(op, payload=()):
+    path = os.path.abspath(DB_FILE)
+    with _writers_lock:
+        w = _writers.get(path)
+        if w is None or w.failed or not w.is_alive():
+            w = _writers[path] = _Writer(path); w.start()
+        return w.submit(op, payload)
+
+# 종료 시 큐에 남은 요청까지 커밋하고 writer 를 멈춘다
+@atexit.register
+def close_writers():
+    with _writers_lock: writers = list(_writers.values()); _writers.clear()
+    for w in writers:
+        if w.is_alive(): w.stop()
+
+def init_db():
+    conn = _connect()
+    c = conn.cursor()
+    c.execute("PRAGMA journal_mode=WAL") # DB 파일에 영구 저장되는 설정
+    c.execute('''CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, 검사일자 TEXT, 의뢰부서 TEXT, 식품명 TEXT, 농약명 TEXT, 검출량 REAL, 허용기준 REAL, 초과량 REAL, 판정 TEXT, 조치내용 TEXT, 적용기준 TEXT, 비고 TEXT)''')
+    # 대장 필터/정렬용 인덱스
+    c.execute("CREATE INDEX IF NOT EXISTS idx_history_date ON history (검사일자)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_history_dept ON history (의뢰부서)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_history_food_pest ON history (식품명, 농약명)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_history_pest ON history (농약명)")
+    _init_summary(c)
+    # 대장이 마지막으로 맞춰진 기준표와 개정 이력 (reg_version.py)
+    c.execute("CREATE TABLE IF NOT EXISTS reg_applied (food_type TEXT, pesticide_name TEXT, limit_mg_kg REAL, PRIMARY KEY (food_type, pesticide_name)) WITHOUT ROWID")
+    c.execute("CREATE TABLE IF NOT EXISTS reg_revisions (rev INTEGER PRIMARY KEY AUTOINCREMENT, applied_at TEXT, source TEXT, changed INTEGER, rejudged INTEGER)")
+    # writer 트랜잭션마다 1씩 증가 (삭제/재판정처럼 max id 가 그대로인 쓰기도 조회 캐시를 무효화)
+    c.execute("CREATE TABLE IF NOT EXISTS write_seq (k INTEGER PRIMARY KEY CHECK (k = 0), seq INTEGER NOT NULL)")
+    c.execute("INSERT OR IGNORE INTO write_seq (k, seq) VALUES (0, 0)")
+    conn.commit(); conn.close()
+
+# 대시보드용 부적합 집계 테이블 - 차원별로 따로 두어 행 수가 (일수 / 부서 수 / 식품 수) 로 제한된다
+# history 트리거로 증분 유지하므로 어떤 경로로 쓰든 항상 맞는다 (기준 개정으로 적합이 된 행은 빠진다)
+SUMMARY_TABLES = {
+    'history_by_day': "substr(COALESCE({r}.검사일자, ''), 1, 10)",
+    'history_by_dept': "COALESCE({r}.의뢰부서, '')",
+    'history_by_food': "COALESCE({r}.식품명, '')",
+}
+
+SUMMARY_UPDATE_OF = "검사일자, 의뢰부서, 식품명, 판정"
+
+def _init_summary(c):
+    for table, expr in SUMMARY_TABLES.items():
+        new_k, old_k = expr.format(r='NEW'), expr.format(r='OLD')
+        inc = f"INSERT INTO {table} (k, cnt) VALUES ({new_k}, 1) ON CONFLICT (k) DO UPDATE SET cnt = cnt + 1;"
+        dec = f"UPDATE {table} SET cnt = cnt - 1 WHERE k = {old_k}; DELETE FROM {table} WHERE k = {old_k} AND cnt <= 0;"
+        want = {f"trg_{table}_{name}": f"CREATE TRIGGER trg_{table}_{name} {body}" for name, body in (
+            ('ins', f"AFTER INSERT ON history WHEN NEW.판정 = '부적합' BEGIN {inc} END"),
+            ('del', f"AFTER DELETE ON history WHEN OLD.판정 = '부적합' BEGIN {dec} END"),
+            ('upd_old', f"AFTER UPDATE OF {SUMMARY_UPDATE_OF} ON history WHEN OLD.판정 = '부적합' BEGIN {dec} END"),
+            ('upd_new', f"AFTER UPDATE OF {SUMMARY_UPDATE_OF} ON history WHEN NEW.판정 = '부적합' BEGIN {inc} END"),
+        )}
+        c.execute(f"CREATE TABLE IF NOT EXISTS {table} (k TEXT PRIMARY KEY, cnt INTEGER NOT NULL) WITHOUT ROWID")
+        have = dict(c.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name GLOB ?", (f"trg_{table}_*",)))
+        # 트리거가 없거나 정의가 바뀐 DB는 트리거를 다시 만들고 전체 집계로 한 번 채운다
+        if have != want:
+            for name in have: c.execute(f"DROP TRIGGER {name}")
+            for sql in want.values(): c.execute(sql)
+            c.execute(f"DELETE FROM {table}")
+            c.execute(f"INSERT INTO {table} (k, cnt) SELECT {expr.format(r='history')}, COUNT(*) FROM history WHERE 판정 = '부적합' GROUP BY 1")
+
+def _history_row(now, dept, food, pest, amount, limit, action, standard, note):
+    excess = round(amount - limit, 4) if amount > limit else 0.0
+    return (now, dept or "-", food, pest, amount, limit, excess, "부적합", action, standard, note)
+
+def save_to_db(dept, food, pest, amount, limit, action, standard, note=""):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    submit_write('insert', [_history_row(now, dept, food, pest, amount, limit, action, standard, note)]).result(timeout=WRITE_WAIT)
+
+# 부적합 건 일괄 저장 (writer 에서 executemany + 단일 트랜잭션)
+# records: judge_batch 결과 DataFrame(식품/농약/검출량/기준/구분[/비고]) 또는 (식품, 농약, 검출량, 기준, 구분) 튜플 목록
+# DataFrame 에 '비고' 컬럼이 있으면 행별 비고를, 없으면 note 를 쓴다
+# wait=False 면 기다리지 않고 Future 를 돌려준다
+def save_many_to_db(dept, records, action, note="", wait=True):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    if isinstance(records, pd.DataFrame):
+        # 컬럼 단위로 _history_row 와 같은 튜플을 만든다 (행마다 함수 호출/itertuples 없이)
+        amt, lim = records['검출량'].astype(float).tolist(), records['기준'].astype(float).tolist()
+        notes = records['비고'].tolist() if '비고' in records.columns else repeat(note)
+        rows = list(zip(repeat(now), repeat(dept or "-"), records['식품'].tolist(), records['농약'].tolist(), amt, lim,
+                        [round(a - l, 4) if a > l else 0.0 for a, l in zip(amt, lim)], repeat("부적합"), repeat(action),
+                        records['구분'].tolist(), notes))
+    else:
+        rows = [_history_row(now, dept, r[0], r[1], float(r[2]), float(r[3]), action, r[4], r[5] if len(r) > 5 else note) for r in records]
+    if not rows:
+        if wait: return 0
+        fut = Future(); fut.set_result(0); return fut
+    fut = submit_write('insert', rows)
+    return fut.result(timeout=WRITE_WAIT) if wait else fut
+
+# filters: {'date_from': 'YYYY-MM-DD', 'date_to': 'YYYY-MM-DD', 'dept': .., 'food': .., 'pest': ..} (빈 값은 무시)
+def _where(filters):
+    clauses, params = [], []
+    filters = filters or {}
+    if filters.get('date_from'):
+        clauses.append("검사일자 >= ?"); params.append(str(filters['date_from']))
+    if filters.get('date_to'): # 검사일자는 'YYYY-MM-DD HH:MM' 문자열 -> 다음날 0시 미만
+        nxt = datetime.strptime(str(filters['date_to'])[:10], "%Y-%m-%d") + timedelta(days=1)
+        clauses.append("검사일자 < ?"); params.append(nxt.strftime("%Y-%m-%d"))
+    for key, col in FILTER_COLUMNS.items():
+        if filters.get(key):
+            clauses.append(f"{col} = ?"); params.append(filters[key])
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def load_history_db(filters=None):
+    where, params = _where(filters)
+    try:
+        with _reader() as conn: return pd.read_sql(f"SELECT * FROM history{where} ORDER BY id DESC", conn, params=params)
+    except: return pd.DataFrame()
+
+# 대장 한 페이지만 조회 (page는 1부터)
+def load_history_page(filters=None, page=1, page_size=100):
+    where, params = _where(filters)
+    try:
+        with _reader() as conn:
+            return pd.read_sql(f"SELECT * FROM history{where} ORDER BY id DESC LIMIT ? OFFSET ?", conn,
+                               params=params + [int(page_size), (max(int(page), 1) - 1) * int(page_size)])
+    except: return pd.DataFrame()
+
+# 대장을 chunk_size 행씩 스트리밍 (fetchmany) - 전체를 메모리에 올리지 않는다
+def iter_history_chunks(filters=None, columns=None, chunk_size=5000):
+    where, params = _where(filters)
+    cols = ", ".join(columns) if columns else "*"
+    with _reader() as conn:
+        cur = conn.execute(f"SELECT {cols} FROM history{where} ORDER BY id DESC", params)
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows: break
+                yield rows
+        finally: cur.close()
+
+def count_history(filters=None):
+    where, params = _where(filters)
+    with _reader() as conn: return conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+# 필터 선택지용 고유값 (인덱스 컬럼만)
+def history_distinct(key):
+    col = FILTER_COLUMNS[key]
+    with _reader() as conn: return [r[0] for r in conn.execute(f"SELECT DISTINCT {col} FROM history WHERE {col} IS NOT NULL ORDER BY {col}")]
+
+# 캐시 무효화 키: (max(id), 쓰기 번호, 기준개정 번호) - 추가/삭제/재판정/초기화가 있으면 바뀐다
+# 쓰기 번호는 writer 커밋마다 올라가므로 대장 전체를 세지 않는다 (건수가 아니므로 빈 대장 판단은 count_history)
+def history_version():
+    with _reader() as conn:
+        return tuple(conn.execute("SELECT (SELECT COALESCE(MAX(id), 0) FROM history), (SELECT seq FROM write_seq), "
+                                  "(SELECT COALESCE(MAX(rev), 0) FROM reg_revisions)").fetchone())
+
+def delete_ids_from_db(ids):
+    if not ids: return 0
+    return submit_write('delete', list(ids)).result(timeout=WRITE_WAIT)
+
+def clear_all_db():
+    return submit_write('clear').result(timeout=WRITE_WAIT)
+
+# 대장에 마지막으로 반영된 기준표 (food_type, pesticide_name, limit)
+def applied_limits():
+    with _reader() as conn:
+        return pd.read_sql("SELECT food_type, pesticide_name, limit_mg_kg AS \"limit\" FROM reg_applied", conn)
+
+# changes: (식품, 농약, 고시기준 또는 None(삭제), 적용할 기준, 적용기준 구분) 목록
+# standards: 재판정 대상 적용기준 (식약처 고시/PLS 로 판정된 행만, 환산/가중평균 행은 제외) -> 재판정 행 수
+def apply_regulation(changes, standards, rejudge=True, source=""):
+    return submit_write('regulation', {'changes': list(changes), 'standards': tuple(standards),
+                                       'rejudge': rejudge, 'source': source}).result(timeout=WRITE_WAIT)
+
+def load_reg_revisions(limit=20):
+    with _reader() as conn:
+        return pd.read_sql("SELECT * FROM reg_revisions ORDER BY rev DESC LIMIT ?", conn, params=[int(limit)])
+
+# 대시보드 지표: 집계 테이블만 읽으므로 대장 크기와 무관
+# mode() 와 같게 건수가 같으면 이름 오름차순 첫 번째
+def load_summary(today=None):
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    with _reader() as conn:
+        total, today_cnt = conn.execute("SELECT COALESCE(SUM(cnt), 0), COALESCE(SUM(CASE WHEN k = ? THEN cnt END), 0) FROM history_by_day", (today,)).fetchone()
+        top = lambda table: (conn.execute(f"SELECT k FROM {table} ORDER BY cnt DESC, k LIMIT 1").fetchone() or ["-"])[0]
+        monthly = conn.execute("SELECT substr(k, 1, 7), SUM(cnt) FROM history_by_day GROUP BY 1 ORDER BY 1").fetchall()
+        foods = conn.execute("SELECT k, cnt FROM history_by_food ORDER BY cnt DESC, k LIMIT 5").fetchall()
+        return {
+            'total': total, 'today': today_cnt, 'top_dept': top('history_by_dept'), 'top_food': top('history_by_food'),
+            'monthly': pd.Series(dict(monthly), name='count', dtype='int64'),
+            'top_foods': pd.Series(dict(foods), name='count', dtype='int64'),
+        }
@@ -0,0 +1,115 @@
+"""야간 일괄 재판정 CLI (Streamlit 없이 app.py 와 같은 판정 로직 사용).
+
+큰 CSV/TSV 는 바이트 범위로 나눠 프로세스 풀 워커가 각자 읽고 판정한다(워커마다 기준표는 한 번만 로드).
+작은 입력/XLSX/워커 1개는 풀 없이 한 프로세스에서 chunk 단위로 판정한다 (chunk 를 워커로 보내는 비용이 판정보다 크다).
+부적합 건은 history.db writer 에 기다리지 않고 넘겨서 저장과 판정이 겹치게 한 뒤 요약을 출력한다.
+
+    python judge_cli.py lims_export.csv --dept 야간점검 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import history_db
+from batch_io import CHUNK_ROWS, SHARD_BYTES, iter_batch_frames, plan_csv_shards, read_csv_shard
+from pest_names import ALIAS_FILE, load_aliases
+from reg_loader import CSV_FILE, load_regulation_table
+from verdict import FAIL_LABEL, LimitIndex, judge_batch
+
+_worker_index = None
+
+
+def build_index(csv_file=CSV_FILE, alias_file=ALIAS_FILE):
+    return LimitIndex(load_regulation_table(csv_file), load_aliases(alias_file))
+
+def _init_worker(csv_file, alias_file):
+    global _worker_index
+    _worker_index = build_index(csv_file, alias_file)
+
+# chunk 하나 판정 -> (행 수, 부적합 행, 적용기준별 건수)
+def _judge(index, chunk):
+    res = judge_batch(index, chunk)
+    return len(res), res[res['판정'] == FAIL_LABEL], res['구분'].value_counts().to_dict()
+
+# 워커: 파일의 바이트 범위 하나를 직접 읽어 판정 (부모는 파일을 읽거나 pickle 하지 않는다)
+def _judge_shard(path, start, end, layout):
+    return _judge(_worker_index, read_csv_shard(path, start, end, layout))
+
+def run(paths, dept="-", action="폐기", note="일괄(CLI)", workers=None, chunk_rows=CHUNK_ROWS,
+        csv_file=CSV_FILE, alias_file=ALIAS_FILE, save=True, violations_out=None, shard_bytes=SHARD_BYTES):
+    workers = workers or os.cpu_count() or 1
+    summary = {'files': len(paths), 'rows': 0, 'violations': 0, 'saved': 0, 'by_standard': {}}
+    started = time.perf_counter()
+    if save: history_db.init_db()
+    vout = open(violations_out, 'w', encoding='utf-8-sig', newline='') if violations_out else None
+    saves = deque()
+
+    def collect(n, bad, counts):
+        summary['rows'] += n; summary['violations'] += len(bad)
+        for k, v in counts.items(): summary['by_standard'][k] = summary['by_standard'].get(k, 0) + v
+        if save and not bad.empty:
+            saves.append(history_db.save_many_to_db(dept, bad, action, note, wait=False))
+            # 메모리 상한: 저장 대기 중인 묶음은 워커 수의 2배까지만
+            while len(saves) > workers * 2: summary['saved'] += saves.popleft().result(timeout=history_db.WRITE_WAIT)
+        if vout is not None and not bad.empty: bad.to_csv(vout, index=False, header=vout.tell() == 0)
+
+    plans = [(path, plan_csv_shards(path, shard_bytes) if workers > 1 else None) for path in paths]
+    try:
+        shards = [(path, s, e, plan[0]) for path, plan in plans if plan for s, e in plan[1]]
+        if shards:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(csv_file, alias_file)) as pool:
+                pending = set()
+                for shard in shards:
+                    # 메모리 상한: 처리 중인 범위는 워커 수의 2배까지만
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done: collect(*fut.result())
+                    pending.add(pool.submit(_judge_shard, *shard))
+                for fut in pending: collect(*fut.result())
+        rest = [path for path, plan in plans if not plan]
+        index = build_index(csv_file, alias_file) if rest else None
+        for path in rest:
+            with open(path, 'rb') as fp:
+                for chunk, _ in iter_batch_frames(fp, path, chunk_rows): collect(*_judge(index, chunk))
+        while saves: summary['saved'] += saves.popleft().result(timeout=history_db.WRITE_WAIT)
+    finally:
+        if vout is not None: vout.close()
+    summary['elapsed_sec'] = round(time.perf_counter() - started, 3)
+    summary['rows_per_sec'] = round(summary['rows'] / summary['elapsed_sec']) if summary['elapsed_sec'] else 0
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="잔류농약 일괄 판정 (CSV/TSV/XLSX: 식품, 농약, 검출량)")
+    ap.add_argument('inputs', nargs='+', help="판정할 입력 파일")
+    ap.add_argument('--dept', default="-", help="의뢰부서")
+    ap.add_argument('--action', default="폐기", help="조치내용")
+    ap.add_argument('--note', default="일괄(CLI)", help="비고")
+    ap.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    ap.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    ap.add_argument('--regulation', default=CSV_FILE, help="기준표 CSV (data.csv)")
+    ap.add_argument('--aliases', default=ALIAS_FILE, help="농약 별칭표 CSV")
+    ap.add_argument('--db', default=history_db.DB_FILE, help="history.db 경로")
+    ap.add_argument('--no-save', action='store_true', help="history.db 에 저장하지 않음")
+    ap.add_argument('--violations-out', help="부적합 행을 CSV 로도 저장")
+    ap.add_argument('--json', action='store_true', help="요약을 JSON 으로 출력")
+    args = ap.parse_args(argv)
+
+    history_db.DB_FILE = args.db
+    try:
+        summary = run(args.inputs, args.dept, args.action, args.note, args.workers, args.chunk_rows,
+                      args.regulation, args.aliases, not args.no_save, args.violations_out)
+    except ValueError as e: ap.exit(2, f"입력 파일 오류: {e}\n") # 컬럼 부족/인코딩 판별 실패 등
+    if args.json: print(json.dumps(summary, ensure_ascii=False))
+    else:
+        print(f"판정 {summary['rows']:,}행 / 부적합 {summary['violations']:,}건 / 저장 {summary['saved']:,}건 "
+              f"({summary['elapsed_sec']}s, {summary['rows_per_sec']:,}행/s)")
+        for k, v in sorted(summary['by_standard'].items()): print(f"  {k}: {v:,}행")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
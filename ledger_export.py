@@ -0,0 +1,69 @@
+"""통합 대장 내보내기 (CSV utf-8-sig / XLSX).
+
+SQLite 에서 chunk 단위로 읽어 바로 파일에 쓰므로 대장 크기와 상관없이 메모리 사용량이 일정하다.
+스케줄 작업용 CLI:
+
+    python ledger_export.py --format xlsx --out report.xlsx --from 2025-01-01 --to 2025-01-31 --dept 품질팀
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+import history_db
+from history_db import iter_history_chunks
+
+# Tab 5 '다운로드'와 같은 컬럼 구성
+EXPORT_COLUMNS = ['id', '검사일자', '의뢰부서', '식품명', '농약명', '검출량', '허용기준', '판정', '적용기준', '비고']
+CHUNK_SIZE = 5000
+
+
+def export_csv(path, filters=None, columns=EXPORT_COLUMNS, chunk_size=CHUNK_SIZE):
+    n = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as fp:
+        w = csv.writer(fp)
+        w.writerow(columns)
+        for rows in iter_history_chunks(filters, columns, chunk_size):
+            w.writerows(rows); n += len(rows)
+    return n
+
+def export_xlsx(path, filters=None, columns=EXPORT_COLUMNS, chunk_size=CHUNK_SIZE):
+    try: from openpyxl import Workbook
+    except ImportError: raise RuntimeError("XLSX 내보내기에는 openpyxl 이 필요합니다. (pip install openpyxl)")
+    wb = Workbook(write_only=True) # write_only: 행을 바로 디스크 임시파일로 흘려보냄
+    ws = wb.create_sheet("통합대장")
+    ws.append(columns)
+    n = 0
+    for rows in iter_history_chunks(filters, columns, chunk_size):
+        for r in rows: ws.append(r)
+        n += len(rows)
+    wb.save(path)
+    return n
+
+EXPORTERS = {'csv': export_csv, 'xlsx': export_xlsx}
+
+# Streamlit download_button 용: 임시 파일로 스트리밍한 뒤 결과 바이트만 넘긴다
+def export_bytes(fmt, filters=None):
+    fd, path = tempfile.mkstemp(suffix='.' + fmt); os.close(fd)
+    try:
+        EXPORTERS[fmt](path, filters)
+        with open(path, 'rb') as fp: return fp.read()
+    finally: os.remove(path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="통합 대장(history.db) 내보내기")
+    ap.add_argument('--format', choices=sorted(EXPORTERS), default='csv')
+    ap.add_argument('--out', required=True, help="저장할 파일 경로")
+    ap.add_argument('--db', default=history_db.DB_FILE, help="history.db 경로")
+    ap.add_argument('--from', dest='date_from', help="검사일자 시작 (YYYY-MM-DD)")
+    ap.add_argument('--to', dest='date_to', help="검사일자 종료 (YYYY-MM-DD)")
+    ap.add_argument('--dept'); ap.add_argument('--food'); ap.add_argument('--pest')
+    args = ap.parse_args(argv)
+    history_db.DB_FILE = args.db
+    flt = {k: getattr(args, k) for k in ('date_from', 'date_to', 'dept', 'food', 'pest')}
+    n = EXPORTERS[args.format](args.out, flt)
+    print(f"{n}건 -> {args.out}")
+
+if __name__ == '__main__':
+    main()
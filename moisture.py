@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from verdict import FAIL_LABEL, PASS_LABEL, judge_batch
+
+MOISTURE_FILE = 'moisture.csv'
+DRIED_STANDARD = "환산"
+DRIED_COLUMNS = ['원물', '농약', '검출량', '원물수분', '건조수분']
+# moisture.csv 가 없을 때 쓰는 기본값 (기존 하드코딩 값)
+DEFAULT_MOISTURE = {"고추": {"raw": 83.0, "dried": 14.0}, "마늘": {"raw": 65.0, "dried": 10.0}, "양파": {"raw": 90.0, "dried": 12.0}}
+
+
+# 수분표 (food_type -> raw_moisture, dried_moisture)
+# moisture.csv 에는 출처(source 컬럼)가 확인된 값만 둔다 - 기준표의 모든 식품을 담지 않으며,
+# 없는 식품은 수분값을 직접 입력하지 않으면 배수 1.0 (법정 기준을 근거 없는 배수로 늘리지 않는다)
+def load_moisture_table(path=MOISTURE_FILE):
+    if os.path.exists(path):
+        tbl = pd.read_csv(path, encoding='utf-8-sig', dtype={'food_type': str})
+        tbl['food_type'] = tbl['food_type'].str.strip()
+        return tbl.drop_duplicates('food_type').set_index('food_type')[['raw_moisture', 'dried_moisture']].astype(float)
+    return pd.DataFrame.from_dict({f: {'raw_moisture': v['raw'], 'dried_moisture': v['dried']} for f, v in DEFAULT_MOISTURE.items()},
+                                  orient='index').rename_axis('food_type')
+
+# Tab 2 입력 기본값: 표에 없거나 한쪽이라도 빈 칸이면 (0.0, 0.0) -> 농축배수 1.0
+def moisture_defaults(table, food):
+    if food is None or food not in table.index: return 0.0, 0.0
+    raw, dried = table.loc[food, ['raw_moisture', 'dried_moisture']]
+    if pd.isna(raw) or pd.isna(dried): return 0.0, 0.0
+    return float(raw), float(dried)
+
+# 농축배수 = (100 - 건조수분) / (100 - 원물수분), 분모가 0이면 1.0 (컬럼 단위)
+def concentration_factors(raw, dried):
+    raw = np.asarray(raw, dtype=float); dried = np.asarray(dried, dtype=float)
+    denom = 100.0 - raw
+    return np.where(denom != 0, (100.0 - dried) / np.where(denom != 0, denom, 1.0), 1.0)
+
+# 건조/가공식품 일괄 환산 판정
+# bdf: 원물, 농약, 검출량 [, 원물수분, 건조수분] - 수분 칸이 비면 수분표 값을 쓰고,
+# 그래도 한쪽이 비면 두 값 모두 0% (배수 1.0 = 원물 기준 그대로)
+def judge_dried_batch(index, table, bdf):
+    base = judge_batch(index, bdf.rename(columns={'원물': '식품'}))
+    foods = base['식품']
+    given = lambda col: pd.to_numeric(bdf[col], errors='coerce').to_numpy() if col in bdf.columns else np.full(len(bdf), np.nan)
+    t_raw = foods.map(table['raw_moisture']).to_numpy(dtype=float)
+    t_dry = foods.map(table['dried_moisture']).to_numpy(dtype=float)
+    g_raw, g_dry = given('원물수분'), given('건조수분')
+    raw = np.where(np.isnan(g_raw), t_raw, g_raw)
+    dry = np.where(np.isnan(g_dry), t_dry, g_dry)
+    missing = np.isnan(raw) | np.isnan(dry)
+    src = np.where(missing, "수분값 없음(배수 1.0)", np.where(~np.isnan(g_raw) | ~np.isnan(g_dry), "입력값", "수분표"))
+    raw, dry = np.where(missing, 0.0, raw), np.where(missing, 0.0, dry)
+    fac = concentration_factors(raw, dry)
+    limit = base['기준'].to_numpy()
+    conv = limit * fac
+    out = pd.DataFrame({
+        '식품': (foods + "(건조)").to_numpy(), '농약': base['농약'].to_numpy(), '검출량': base['검출량'].to_numpy(),
+        '원물기준': limit, '원물기준구분': base['구분'].to_numpy(), '원물수분': raw, '건조수분': dry, '수분출처': src,
+        '농축배수': fac, '기준': conv, '구분': DRIED_STANDARD,
+    })
+    out['판정'] = np.where(out['검출량'].to_numpy() > conv, FAIL_LABEL, PASS_LABEL)
+    # Tab 2 단건 저장과 같은 산출 근거 표기
+    out['비고'] = [f"원물{l}x{f:.2f}" for l, f in zip(limit.tolist(), fac.tolist())]
+    return out
@@ -0,0 +1,107 @@
+import csv
+import difflib
+import os
+import re
+
+ALIAS_FILE = 'pesticide_aliases.csv'
+NGRAM = 2 # 한글 농약명은 짧아서 bigram 사용
+FUZZY_CUTOFF = 0.8 # 오타 보정 추천 최소 유사도 (difflib ratio)
+FUZZY_POOL = 20 # n-gram 점수 상위 몇 개만 정밀 비교할지
+CACHE_MAX = 100_000
+
+# 검색용 정규화: 대문자 + 공백/하이픈/구두점 제거 ("Kresoxim-methyl" == "KRESOXIMMETHYL")
+def _norm(text):
+    return re.sub(r'[\s\-_·,.]', '', str(text)).upper()
+
+def _grams(key):
+    if len(key) < NGRAM: return {key} if key else set()
+    return {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+# 별칭 파일(alias,pesticide_name) 읽기 - 영문명/CAS 번호 등 -> 기준표 농약명
+def load_aliases(path=ALIAS_FILE):
+    if not os.path.exists(path): return {}
+    with open(path, encoding='utf-8-sig', newline='') as fp:
+        return {r['alias'].strip(): r['pesticide_name'].strip()
+                for r in csv.DictReader(fp) if r.get('alias') and r.get('pesticide_name')}
+
+
+class PesticideResolver:
+    """기준표 고유 농약명 + 별칭 위에 만든 이름 해석기.
+
+    우선순위: 정확히 일치 > 별칭/정규화 일치 > 부분일치 > 오타 보정(n-gram 후보 + difflib).
+    같은 순위 안에서는 점수, 그 다음 기준표 등장 순서로 정렬한다.
+    오타 보정 후보는 추천용으로만 쓰고 판정에 자동 적용하지 않는다 (디메토에이트 -> 오메토에이트 처럼
+    다른 성분으로 바뀌면 PLS 대신 엉뚱한 기준이 적용되므로).
+    """
+
+    KIND_RANK = {'exact': 0, 'alias': 1, 'partial': 2, 'fuzzy': 3}
+    AUTO_KINDS = ('exact', 'alias', 'partial')
+
+    def __init__(self, names, aliases=None):
+        self.names = list(dict.fromkeys(names))
+        self.name_set = set(self.names)
+        self._order = {n: i for i, n in enumerate(self.names)}
+        # 검색 항목: (정규화 키, 기준표 농약명) - 표준명 다음에 별칭
+        self._entries = [(_norm(n), n) for n in self.names]
+        self._exact = {}
+        for key, name in self._entries: self._exact.setdefault(key, name)
+        self._alias = {}
+        for alias, name in (aliases or {}).items():
+            if name not in self.name_set: continue # 기준표에 없는 대상은 무시
+            key = _norm(alias)
+            if key in self._exact or key in self._alias: continue
+            self._alias[key] = name
+            self._entries.append((key, name))
+        self._postings = {}
+        for i, (key, _) in enumerate(self._entries):
+            for g in _grams(key): self._postings.setdefault(g, set()).add(i)
+        self._cache = {}
+
+    def candidates(self, query, limit=5):
+        """순위가 매겨진 후보 [(농약명, 점수, 종류), ...]"""
+        q = _norm(query)
+        if not q: return []
+        best = {}
+        def add(name, score, kind):
+            cur = best.get(name)
+            cand = (self.KIND_RANK[kind], -score)
+            if cur is None or cand < (self.KIND_RANK[cur[1]], -cur[0]): best[name] = (score, kind)
+
+        if q in self._exact: add(self._exact[q], 1.0, 'exact')
+        if q in self._alias: add(self._alias[q], 1.0, 'alias')
+
+        grams = _grams(q)
+        if len(q) >= NGRAM:
+            ids = set.intersection(*(self._postings.get(g, set()) for g in grams))
+        else:
+            ids = range(len(self._entries))
+        for i in ids:
+            key, name = self._entries[i]
+            if q in key and key != q:
+                add(name, 0.5 + 0.4 * len(q) / len(key) + (0.1 if key.startswith(q) else 0.0), 'partial')
+
+        # 오타 보정(추천용): 공유 n-gram 수로 후보를 좁힌 뒤 difflib 로 정밀 비교
+        hits = {}
+        for g in grams:
+            for i in self._postings.get(g, ()): hits[i] = hits.get(i, 0) + 1
+        pool = sorted(hits, key=lambda i: -2 * hits[i] / (len(grams) + len(_grams(self._entries[i][0]))))[:FUZZY_POOL]
+        for i in pool:
+            key, name = self._entries[i]
+            ratio = difflib.SequenceMatcher(None, q, key).ratio()
+            if ratio >= FUZZY_CUTOFF: add(name, ratio, 'fuzzy')
+
+        ranked = sorted(best.items(), key=lambda kv: (self.KIND_RANK[kv[1][1]], -kv[1][0], self._order[kv[0]]))
+        return [(name, round(score, 4), kind) for name, (score, kind) in ranked[:limit]]
+
+    def resolve(self, query):
+        """정확/별칭/부분일치 최상위 농약명, 없으면 입력값 그대로 (-> PLS 적용, 오타 보정은 하지 않음)"""
+        if query in self.name_set: return query
+        if query not in self._cache:
+            if len(self._cache) >= CACHE_MAX: self._cache.clear()
+            cands = self.candidates(query, limit=1)
+            self._cache[query] = cands[0][0] if cands and cands[0][2] in self.AUTO_KINDS else query
+        return self._cache[query]
+
+    def suggest(self, query, limit=3):
+        """기준표에 없는 이름에 대한 추천 농약명 (오타 보정 후보 포함)"""
+        return [name for name, _, _ in self.candidates(query, limit)]
@@ -0,0 +1,91 @@
+"""재실행(rerun) 구간/함수 호출 시간 측정.
+
+- 꺼져 있으면 아무것도 감싸지 않는다 (timed 는 원래 함수를 그대로 돌려주고, lap 은 즉시 반환).
+- 켜져 있으면 이름별로 최근 WINDOW 개 측정값을 메모리에 유지하고 백분위를 계산한다.
+- PESTICIDE_PROFILE=1 로 시작 시 켜고, PESTICIDE_PROFILE_LOG=1 이면 측정마다 로그 한 줄을 남긴다.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+WINDOW = 500
+logger = logging.getLogger("pesticide.profile")
+
+_enabled = os.environ.get("PESTICIDE_PROFILE", "") not in ("", "0")
+_log_each = os.environ.get("PESTICIDE_PROFILE_LOG", "") not in ("", "0")
+_samples = {}
+_counts = {}
+_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+def set_enabled(flag):
+    global _enabled
+    _enabled = bool(flag)
+
+def record(name, ms):
+    with _lock:
+        if name not in _samples: _samples[name] = deque(maxlen=WINDOW)
+        _samples[name].append(ms)
+        _counts[name] = _counts.get(name, 0) + 1
+    if _log_each: logger.info(json.dumps({'name': name, 'ms': round(ms, 3)}, ensure_ascii=False))
+
+def reset():
+    with _lock: _samples.clear(); _counts.clear()
+
+# 함수 호출 시간 측정 래퍼 - 꺼져 있으면 원래 함수를 그대로 반환 (호출 비용 0)
+def timed(name, fn):
+    if not _enabled: return fn
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t = time.perf_counter()
+        try: return fn(*args, **kwargs)
+        finally: record(name, (time.perf_counter() - t) * 1000)
+    return wrapper
+
+
+class Laps:
+    """위에서 아래로 실행되는 스크립트용 구간 타이머: lap("구간명") 은 직전 lap 이후 걸린 시간을 기록."""
+
+    def __init__(self, prefix="rerun"):
+        self.prefix = prefix
+        self.on = _enabled
+        self.start = self.last = time.perf_counter()
+
+    def __call__(self, name):
+        if not self.on: return
+        now = time.perf_counter()
+        record(f"{self.prefix}.{name}", (now - self.last) * 1000)
+        self.last = now
+
+    def done(self):
+        if self.on: record(f"{self.prefix}.total", (time.perf_counter() - self.start) * 1000)
+
+
+def _pct(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))]
+
+# 이름별 요약 [{name, calls, last_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}, ...] (p95 내림차순)
+def snapshot():
+    with _lock: data = {k: list(v) for k, v in _samples.items()}; counts = dict(_counts)
+    rows = []
+    for name, vals in data.items():
+        if not vals: continue
+        s = sorted(vals)
+        rows.append({'name': name, 'calls': counts.get(name, len(vals)), 'last_ms': round(vals[-1], 3),
+                     'mean_ms': round(sum(s) / len(s), 3), 'p50_ms': round(_pct(s, 0.5), 3),
+                     'p95_ms': round(_pct(s, 0.95), 3), 'p99_ms': round(_pct(s, 0.99), 3), 'max_ms': round(s[-1], 3)})
+    return sorted(rows, key=lambda r: -r['p95_ms'])
+
+def dump_json():
+    return json.dumps({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'window': WINDOW, 'stats': snapshot()},
+                      ensure_ascii=False, indent=1)
+
+def log_snapshot():
+    for row in snapshot(): logger.info(json.dumps(row, ensure_ascii=False))
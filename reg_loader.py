@@ -0,0 +1,72 @@
+import csv
+import glob
+import os
+import pickle
+
+import pandas as pd
+
+from verdict import clean_amounts
+
+CSV_FILE = 'data.csv'
+SNAPSHOT_DIR = '.cache'
+SNAPSHOT_VERSION = 1 # 스냅샷 구조가 바뀌면 올려서 기존 스냅샷 무효화
+ENCODINGS = ['utf-8', 'cp949', 'euc-kr']
+SNIFF_BYTES = 64 * 1024
+
+
+# 앞부분 바이트로 인코딩/구분자를 한 번에 판별 -> (encoding, sep)
+def sniff_bytes(head, full=False):
+    if not full: head = head[:head.rfind(b'\n') + 1] or head # 잘린 멀티바이트 글자 제외
+    for enc in ENCODINGS:
+        try: text = head.decode(enc)
+        except UnicodeDecodeError: continue
+        try: sep = csv.Sniffer().sniff(text.lstrip('\ufeff'), delimiters='\t,;|').delimiter
+        except csv.Error: sep = '\t' if '\t' in (text.splitlines() or [''])[0] else ','
+        return ('utf-8-sig' if enc == 'utf-8' else enc), sep
+    raise ValueError("지원하지 않는 인코딩입니다.")
+
+def sniff_format(csv_file):
+    with open(csv_file, 'rb') as fp: head = fp.read(SNIFF_BYTES)
+    return sniff_bytes(head, full=len(head) < SNIFF_BYTES)
+
+# C 엔진으로 파싱 + 범주형 키 + float 기준값(limit) 컬럼
+def parse_regulation_csv(csv_file):
+    enc, sep = sniff_format(csv_file)
+    df = pd.read_csv(csv_file, encoding=enc, sep=sep, engine='c', dtype=str)
+    df.columns = df.columns.str.strip()
+    if 'limit_mg_kg' not in df.columns and 'limi_mg_kg' in df.columns:
+        df = df.rename(columns={'limi_mg_kg': 'limit_mg_kg'}) # data.csv 헤더 오타 보정
+    if 'food_type' not in df.columns or 'pesticide_name' not in df.columns or 'limit_mg_kg' not in df.columns:
+        raise ValueError(f"필수 컬럼이 없습니다: {list(df.columns)}")
+    for col in ('food_type', 'pesticide_name'):
+        df[col] = df[col].astype(str).str.strip().astype('category')
+    df['limit'] = clean_amounts(df['limit_mg_kg']).to_numpy()
+    return df
+
+# 스냅샷은 CSV 와 같은 폴더의 .cache/ 에 (실행 위치와 무관)
+def _snapshot_dir(csv_file):
+    return os.path.join(os.path.dirname(os.path.abspath(csv_file)), SNAPSHOT_DIR)
+
+def _snapshot_prefix(csv_file):
+    return os.path.join(_snapshot_dir(csv_file), os.path.basename(csv_file) + '.')
+
+def snapshot_path(csv_file):
+    info = os.stat(csv_file)
+    return f"{_snapshot_prefix(csv_file)}v{SNAPSHOT_VERSION}-{info.st_size}-{info.st_mtime_ns}.pkl"
+
+# 스냅샷(pickle)이 있으면 바로 읽고, 없으면 CSV 파싱 후 저장 - 키는 CSV 크기/수정시각
+def load_regulation_table(csv_file=CSV_FILE):
+    path = snapshot_path(csv_file)
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as fp: return pickle.load(fp)
+        except Exception: pass # 깨진 스냅샷은 새로 만든다
+    df = parse_regulation_csv(csv_file)
+    try:
+        os.makedirs(_snapshot_dir(csv_file), exist_ok=True)
+        for old in glob.glob(glob.escape(_snapshot_prefix(csv_file)) + '*.pkl'): os.remove(old)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as fp: pickle.dump(df, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path) # 여러 워커가 동시에 써도 원자적으로 교체
+    except OSError: pass # 읽기 전용 환경이면 스냅샷 없이 동작
+    return df
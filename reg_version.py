@@ -0,0 +1,116 @@
+"""기준표(data.csv) 개정 반영: 변경 감지 -> 개정분 diff -> 인덱스 원자적 교체 -> 대장 증분 재판정.
+
+- 변경 감지는 파일 크기/수정시각 비교라 재실행마다 호출해도 비용이 없다.
+- 대장이 마지막으로 맞춰진 기준표는 history.db 의 reg_applied 에 있어서 서버를 다시 띄워도
+  그 사이의 개정분을 놓치지 않는다 (처음 한 번은 현재 기준표로 채우기만 하고 재판정하지 않음).
+- 재판정은 바뀐 (식품, 농약) 쌍만 idx_history_food_pest 인덱스로 찾아 UPDATE 한다.
+  적합이 된 행은 조치내용을 비우고 대시보드 부적합 집계(history_by_*)에서 빠진다.
+
+    python reg_version.py              # data.csv 개정분을 대장에 반영
+    python reg_version.py --dry-run    # 바뀐 기준만 출력
+"""
+import argparse
+import os
+import sys
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import history_db
+from pest_names import ALIAS_FILE, load_aliases
+from reg_loader import CSV_FILE, load_regulation_table
+from verdict import MFDS_STANDARD, PLS_LIMIT, PLS_STANDARD, LimitIndex
+
+DIFF_COLUMNS = ['food_type', 'pesticide_name', 'old_limit', 'new_limit']
+
+RegState = namedtuple('RegState', 'signature table index version')
+RegChange = namedtuple('RegChange', 'diff rejudged')
+
+
+def file_signature(csv_file):
+    info = os.stat(csv_file)
+    return info.st_size, info.st_mtime_ns
+
+# 두 기준표 frame(food_type, pesticide_name, limit) 비교 -> 추가/삭제/변경된 쌍 (없는 쪽은 NaN)
+def diff_limits(old, new):
+    key = ['food_type', 'pesticide_name']
+    as_str = lambda fr: fr[key + ['limit']].astype({'food_type': str, 'pesticide_name': str})
+    m = as_str(old).merge(as_str(new), on=key, how='outer', suffixes=('_old', '_new'))
+    o, n = m['limit_old'].to_numpy(dtype=float), m['limit_new'].to_numpy(dtype=float)
+    same = (o == n) | (np.isnan(o) & np.isnan(n))
+    return m.loc[~same].rename(columns={'limit_old': 'old_limit', 'limit_new': 'new_limit'})[DIFF_COLUMNS].reset_index(drop=True)
+
+# diff -> history_db.apply_regulation 입력 (고시 기준이 없어지면 PLS 로 재판정)
+def _changes(diff):
+    for f, p, new in zip(diff['food_type'], diff['pesticide_name'], diff['new_limit']):
+        if pd.isna(new): yield f, p, None, PLS_LIMIT, PLS_STANDARD
+        else: yield f, p, float(new), float(new), MFDS_STANDARD
+
+# 대장을 index 기준표에 맞춘다 -> (diff, 재판정 행 수)
+def sync_history(index, source="", dry_run=False):
+    applied = history_db.applied_limits()
+    diff = diff_limits(applied, index.frame)
+    if dry_run or diff.empty: return diff, 0
+    # 처음에는 현재 기준표를 적용 기준으로 기록만 (기존 대장은 이미 이 표로 판정된 것으로 본다)
+    return diff, history_db.apply_regulation(_changes(diff), (MFDS_STANDARD, PLS_STANDARD), rejudge=not applied.empty, source=source)
+
+
+class RegulationManager:
+    """기준표 버전 관리자: 현재 (기준표, 인덱스) 를 들고 있다가 data.csv 가 바뀌면 통째로 교체한다.
+
+    새 인덱스를 다 만든 뒤 state 한 번 대입으로 바꾸므로, 다른 스레드는 항상 옛 것 또는 새 것 하나를 본다.
+    """
+
+    def __init__(self, csv_file=CSV_FILE, alias_file=ALIAS_FILE):
+        self.csv_file = csv_file
+        self.alias_file = alias_file
+        self.state = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        return self.state.index if self.state else None
+
+    @property
+    def table(self):
+        return self.state.table if self.state else None
+
+    @property
+    def version(self):
+        return self.state.version if self.state else 0
+
+    # 바뀌었으면 다시 읽고 대장 반영 후 교체 -> RegChange, 그대로면 None
+    # 파일이 없거나 읽을 수 없으면 예외 (기존 state 는 그대로 유지)
+    def refresh(self):
+        sig = file_signature(self.csv_file)
+        if self.state is not None and self.state.signature == sig: return None
+        with self._lock:
+            cur = self.state
+            if cur is not None and cur.signature == sig: return None
+            table = load_regulation_table(self.csv_file)
+            index = LimitIndex(table, load_aliases(self.alias_file))
+            diff, rejudged = sync_history(index, source=f"{os.path.basename(self.csv_file)} {sig[0]}B")
+            self.state = RegState(sig, table, index, cur.version + 1 if cur else 1)
+            return RegChange(diff, rejudged)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="기준표 개정분을 history.db 대장에 반영 (바뀐 기준의 행만 재판정)")
+    ap.add_argument('--regulation', default=CSV_FILE, help="기준표 CSV (data.csv)")
+    ap.add_argument('--aliases', default=ALIAS_FILE, help="농약 별칭표 CSV")
+    ap.add_argument('--db', default=history_db.DB_FILE, help="history.db 경로")
+    ap.add_argument('--dry-run', action='store_true', help="대장은 그대로 두고 바뀐 기준만 출력")
+    args = ap.parse_args(argv)
+
+    history_db.DB_FILE = args.db
+    history_db.init_db()
+    index = LimitIndex(load_regulation_table(args.regulation), load_aliases(args.aliases))
+    diff, rejudged = sync_history(index, source=f"CLI {os.path.basename(args.regulation)}", dry_run=args.dry_run)
+    if not diff.empty: print(diff.to_string(index=False, max_rows=50))
+    print(f"기준 변경 {len(diff):,}건 / 재판정 {rejudged:,}건" + (" (dry-run)" if args.dry_run else ""))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
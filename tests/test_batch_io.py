@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from batch_io import iter_batch_frames
+from moisture import DRIED_COLUMNS
+
+
+def _rows(data, name='batch.tsv', **kw):
+    return [r for df, _ in iter_batch_frames(data, name, **kw) for r in df.values.tolist()]
+
+
+def _xlsx(rows):
+    wb = Workbook()
+    for r in rows: wb.active.append(r)
+    buf = io.BytesIO(); wb.save(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize('first', ['N.D.', '불검출', ''])
+def test_first_row_without_digits_is_data(first):
+    data = f"가지\t다이아지논\t{first}\n감자\t다이아지논\t0.5\n".encode('cp949')
+    assert _rows(data) == [['가지', '다이아지논', first], ['감자', '다이아지논', '0.5']]
+    assert _rows(_xlsx([['가지', '다이아지논', first or None], ['감자', '다이아지논', 0.5]]), 'batch.xlsx')[0][:2] == ['가지', '다이아지논']
+
+
+@pytest.mark.parametrize('header', ['식품,농약,검출량', '시료명,농약명,결과(mg/kg)', 'food_type,pesticide_name,amount'])
+def test_header_row_by_column_names(header):
+    data = f"{header}\n가지,다이아지논,0.5\n".encode('utf-8-sig')
+    assert _rows(data, 'batch.csv') == [['가지', '다이아지논', '0.5']]
+    assert _rows(_xlsx([header.split(','), ['가지', '다이아지논', 0.5]]), 'batch.xlsx') == [['가지', '다이아지논', 0.5]]
+
+
+def test_dried_header_wider_than_rows():
+    data = "원물,농약,검출량,원물수분,건조수분\n고추,다이아지논,1\n".encode('utf-8')
+    assert _rows(data, 'batch.csv', columns=DRIED_COLUMNS) == [['고추', '다이아지논', '1', '', '']]
+
+
+def test_too_few_columns_is_clear_error():
+    with pytest.raises(ValueError, match="최소 3개 컬럼"):
+        _rows("가지,다이아지논\n감자,다이아지논\n".encode('utf-8'), 'batch.csv')
+    with pytest.raises(ValueError, match="최소 3개 컬럼"):
+        _rows(_xlsx([['가지', '다이아지논']]), 'batch.xlsx')
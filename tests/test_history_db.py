@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import history_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_db, 'DB_FILE', str(tmp_path / 'history.db'))
+    history_db.init_db()
+    yield history_db.DB_FILE
+    history_db.close_writers()
+
+
+def _row(food='가지'):
+    return history_db._history_row("2026-01-01 09:00", "검사과", food, '다이아지논', 0.5, 0.05, "폐기", "식약처 고시", "")
+
+
+def _seq(db):
+    with sqlite3.connect(db) as conn: return conn.execute("SELECT seq FROM write_seq").fetchone()[0]
+
+
+def test_concurrent_single_saves(db):
+    def user(i):
+        for _ in range(25): history_db.save_to_db(f"부서{i}", '가지', '다이아지논', 0.5, 0.05, "폐기", "식약처 고시")
+    with ThreadPoolExecutor(8) as pool: list(pool.map(user, range(8)))
+    assert history_db.count_history() == 200
+    assert history_db.load_summary()['total'] == 200
+
+
+def test_failed_job_does_not_roll_back_its_group(db):
+    # 시작 전에 쌓아 두면 writer 가 한 트랜잭션으로 묶는다
+    w = history_db._Writer(os.path.abspath(db))
+    before = _seq(db)
+    futs = [w.submit('insert', [_row('가지')]), w.submit('delete', [{'bad': 'id'}]), w.submit('insert', [_row('감자')])]
+    w.start()
+    assert futs[0].result(timeout=10) == 1 and futs[2].result(timeout=10) == 1
+    with pytest.raises(sqlite3.Error): futs[1].result(timeout=10)
+    w.stop()
+    assert _seq(db) == before + 1 # 한 번의 커밋
+    assert sorted(history_db.history_distinct('food')) == ['가지', '감자']
+
+
+def test_retries_while_another_connection_holds_the_lock(db, monkeypatch):
+    monkeypatch.setattr(history_db, 'WRITE_TIMEOUT', 0.01) # 대기 대신 busy 오류 -> 재시도
+    other = sqlite3.connect(db, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.2, lambda: other.execute("COMMIT"))
+    timer.start()
+    try:
+        history_db.save_to_db("검사과", '가지', '다이아지논', 0.5, 0.05, "폐기", "식약처 고시")
+    finally:
+        timer.join(); other.close()
+    assert history_db.count_history() == 1
+
+
+def test_connect_failure_fails_pending_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_db, 'DB_FILE', str(tmp_path / 'missing' / 'history.db'))
+    try:
+        t = time.perf_counter()
+        futs = [history_db.submit_write('insert', [_row()]) for _ in range(20)]
+        for fut in futs:
+            with pytest.raises(sqlite3.OperationalError): fut.result(timeout=10)
+        with pytest.raises(sqlite3.OperationalError):
+            history_db.save_to_db("검사과", '가지', '다이아지논', 0.5, 0.05, "폐기", "식약처 고시")
+        assert time.perf_counter() - t < 5
+        # 경로가 생기면 새 writer 로 다시 저장된다
+        os.makedirs(tmp_path / 'missing'); history_db.init_db()
+        history_db.save_to_db("검사과", '가지', '다이아지논', 0.5, 0.05, "폐기", "식약처 고시")
+        assert history_db.count_history() == 1
+    finally: history_db.close_writers()
@@ -0,0 +1,35 @@
+import pandas as pd
+
+import judge_cli
+from batch_io import iter_batch_frames, plan_csv_shards, read_csv_shard
+
+REG_CSV = "food_type,pesticide_name,limit_mg_kg\n가지,다이아지논,0.05\n감자,다이아지논,0.1\n오이,아세타미프리드,0.7\n"
+
+
+def _batch(path, rows=3000):
+    foods, pests = ['가지', '감자', '오이', '없는식품'], ['다이아지논', '아세타미프리드']
+    lines = [f"{foods[i % 4]}\t{pests[i % 2]}\t{(i % 97) / 100}" for i in range(rows)]
+    path.write_text("식품\t농약\t검출량\n" + "\n".join(lines) + "\n", encoding='cp949')
+    return str(path)
+
+
+def test_shards_match_streamed_frames(tmp_path):
+    path = _batch(tmp_path / 'batch.tsv')
+    for shard_bytes in (1000, 4096, 7777):
+        layout, shards = plan_csv_shards(path, shard_bytes)
+        got = pd.concat([read_csv_shard(path, s, e, layout) for s, e in shards], ignore_index=True)
+        with open(path, 'rb') as fp:
+            want = pd.concat([c for c, _ in iter_batch_frames(fp, path)], ignore_index=True)
+        assert len(got) == 3000 and got.equals(want)
+
+
+def test_sharded_pool_matches_single_process(tmp_path):
+    reg = tmp_path / 'data.csv'
+    reg.write_text(REG_CSV, encoding='utf-8')
+    path = _batch(tmp_path / 'batch.tsv')
+    kw = dict(csv_file=str(reg), alias_file=str(tmp_path / 'none.csv'), save=False)
+    one = judge_cli.run([path], workers=1, **kw)
+    pool = judge_cli.run([path, path], workers=2, shard_bytes=4096, **kw)
+    assert one['rows'] == 3000 and pool['rows'] == 6000
+    assert pool['violations'] == 2 * one['violations']
+    assert pool['by_standard'] == {k: 2 * v for k, v in one['by_standard'].items()}
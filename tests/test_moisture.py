@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import moisture
+from moisture import DRIED_COLUMNS, MOISTURE_FILE, judge_dried_batch, load_moisture_table, moisture_defaults
+from verdict import FAIL_LABEL, PASS_LABEL, LimitIndex
+
+REG = pd.DataFrame({
+    'food_type': ['고추', '가지', '감'],
+    'pesticide_name': ['다이아지논'] * 3,
+    'limit_mg_kg': ['0.1'] * 3,
+})
+# 고추: 두 값 / 가지: 건조수분 없음 (반쪽) / 감: 표에 없음
+TABLE = pd.DataFrame({'raw_moisture': [83.0, 93.0], 'dried_moisture': [14.0, np.nan]},
+                     index=pd.Index(['고추', '가지'], name='food_type'))
+
+
+def _judge(rows):
+    return judge_dried_batch(LimitIndex(REG), TABLE, pd.DataFrame(rows, columns=DRIED_COLUMNS))
+
+
+def test_moisture_defaults_half_filled_and_missing():
+    assert moisture_defaults(TABLE, '고추') == (83.0, 14.0)
+    assert moisture_defaults(TABLE, '가지') == (0.0, 0.0)
+    assert moisture_defaults(TABLE, '감') == (0.0, 0.0)
+    assert moisture_defaults(TABLE, None) == (0.0, 0.0)
+
+
+def test_missing_moisture_keeps_raw_limit():
+    # 건조수분을 0% 로 보면 가지 배수가 14.29 가 되어 0.5 가 적합으로 빠진다
+    rs = _judge([['가지', '다이아지논', '0.5', '', ''], ['감', '다이아지논', '0.5', '', '']])
+    assert rs['농축배수'].tolist() == [1.0, 1.0]
+    assert rs['기준'].tolist() == [0.1, 0.1]
+    assert rs['판정'].tolist() == [FAIL_LABEL, FAIL_LABEL]
+    assert rs['수분출처'].tolist() == ["수분값 없음(배수 1.0)"] * 2
+
+
+def test_table_and_row_overrides():
+    rs = _judge([
+        ['고추', '다이아지논', '0.5', '', ''], # 수분표 83/14 -> 배수 5.06
+        ['고추', '다이아지논', '0.5', '90', ''], # 원물만 입력, 건조는 수분표
+        ['가지', '다이아지논', '0.5', '', '10'], # 건조만 입력, 원물은 수분표
+        ['감', '다이아지논', '0.5', '80', '20'], # 표에 없어도 두 값 입력
+        ['감', '다이아지논', '0.5', '', '20'], # 한쪽만 입력 -> 배수 1.0
+    ])
+    assert rs['농축배수'].tolist() == pytest.approx([86 / 17, 86 / 10, 90 / 7, 4.0, 1.0])
+    assert rs['수분출처'].tolist() == ["수분표", "입력값", "입력값", "입력값", "수분값 없음(배수 1.0)"]
+    assert rs['판정'].tolist() == [PASS_LABEL, PASS_LABEL, PASS_LABEL, FAIL_LABEL, FAIL_LABEL]
+
+
+def test_moisture_file_has_sources():
+    path = os.path.join(os.path.dirname(moisture.__file__), MOISTURE_FILE)
+    raw = pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+    assert raw['source'].str.strip().ne('').all() # 출처 없는 값은 두지 않는다
+    tbl = load_moisture_table(path)
+    assert tbl.notna().all().all()
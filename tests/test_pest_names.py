@@ -0,0 +1,17 @@
+from pest_names import PesticideResolver
+
+NAMES = ['오메토에이트', '펜뷰코나졸', '테플루벤주론', '퍼메트린', '아세타미프리드']
+
+
+def test_fuzzy_is_suggestion_only():
+    r = PesticideResolver(NAMES)
+    for typo, near in [('디메토에이트', '오메토에이트'), ('펜코나졸', '펜뷰코나졸'), ('디플루벤주론', '테플루벤주론'), ('사이퍼메트린', '퍼메트린')]:
+        assert r.resolve(typo) == typo # 다른 성분으로 바꾸지 않음 -> PLS
+        assert near in r.suggest(typo)
+
+
+def test_exact_alias_partial_resolve():
+    r = PesticideResolver(NAMES, {'Acetamiprid': '아세타미프리드'})
+    assert r.resolve('퍼메트린') == '퍼메트린'
+    assert r.resolve('ACETAMIPRID') == '아세타미프리드'
+    assert r.resolve('아세타') == '아세타미프리드'
@@ -0,0 +1,91 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import history_db
+from composite import COMPOSITE_STANDARD
+from moisture import DRIED_STANDARD
+from reg_version import diff_limits, sync_history
+from verdict import MFDS_STANDARD, PLS_STANDARD, LimitIndex
+
+OLD = pd.DataFrame({
+    'food_type': ['사과', '배', '포도'],
+    'pesticide_name': ['가스가마이신', '다이아지논', '아세타미프리드'],
+    'limit_mg_kg': ['0.5', '0.5', '1.0'],
+})
+# 사과 기준 변경(0.5 -> 1.0), 배 기준 삭제(-> PLS), 감 기준 추가, 포도 그대로
+NEW = pd.DataFrame({
+    'food_type': ['사과', '포도', '감'],
+    'pesticide_name': ['가스가마이신', '아세타미프리드', '다이아지논'],
+    'limit_mg_kg': ['1.0', '1.0', '0.05'],
+})
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_db, 'DB_FILE', str(tmp_path / 'history.db'))
+    history_db.init_db()
+    yield history_db.DB_FILE
+    history_db.close_writers()
+
+
+def test_diff_limits_added_removed_changed():
+    diff = diff_limits(LimitIndex(OLD).frame, LimitIndex(NEW).frame)
+    got = {(f, p): (o, n) for f, p, o, n in diff.itertuples(index=False)}
+    assert set(got) == {('사과', '가스가마이신'), ('배', '다이아지논'), ('감', '다이아지논')}
+    assert got[('사과', '가스가마이신')] == (0.5, 1.0)
+    assert got[('배', '다이아지논')][0] == 0.5 and pd.isna(got[('배', '다이아지논')][1])
+    assert pd.isna(got[('감', '다이아지논')][0]) and got[('감', '다이아지논')][1] == 0.05
+
+
+def test_sync_history_rejudges_only_changed_pairs(db):
+    diff, n = sync_history(LimitIndex(OLD)) # 처음에는 기록만
+    assert len(diff) == 3 and n == 0
+    history_db.save_many_to_db("검사과", [
+        ('사과', '가스가마이신', 0.8, 0.5, MFDS_STANDARD), # 변경 -> 적합
+        ('배', '다이아지논', 0.6, 0.5, MFDS_STANDARD), # 삭제 -> PLS 로 부적합 유지
+        ('감', '다이아지논', 0.02, 0.01, PLS_STANDARD), # 추가 -> 적합
+        ('포도', '아세타미프리드', 1.5, 1.0, MFDS_STANDARD), # 그대로
+        ('사과', '가스가마이신', 0.8, 0.2, DRIED_STANDARD), # 환산/가중평균 행은 손대지 않는다
+        ('사과', '가스가마이신', 0.8, 0.3, COMPOSITE_STANDARD),
+    ], "폐기")
+    before = history_db.load_summary()
+    assert before['total'] == 6
+
+    diff, n = sync_history(LimitIndex(NEW))
+    assert len(diff) == 3 and n == 3
+    with sqlite3.connect(db) as conn:
+        rows = {(f, s): (lim, v, a) for f, s, lim, v, a in conn.execute(
+            "SELECT 식품명, 적용기준, 허용기준, 판정, 조치내용 FROM history")}
+    assert rows[('사과', MFDS_STANDARD)] == (1.0, '적합', '-')
+    assert rows[('배', PLS_STANDARD)] == (0.01, '부적합', '폐기')
+    assert rows[('감', MFDS_STANDARD)] == (0.05, '적합', '-')
+    assert rows[('포도', MFDS_STANDARD)] == (1.0, '부적합', '폐기')
+    assert rows[('사과', DRIED_STANDARD)] == (0.2, '부적합', '폐기')
+    assert rows[('사과', COMPOSITE_STANDARD)] == (0.3, '부적합', '폐기')
+
+    # 적합이 된 행은 대시보드 집계에서 빠진다
+    after = history_db.load_summary()
+    assert after['total'] == 4
+    assert after['top_foods'].to_dict() == {'사과': 2, '배': 1, '포도': 1}
+    assert sync_history(LimitIndex(NEW))[1] == 0
+
+
+def test_history_version_changes_on_delete_after_rejudge(db):
+    sync_history(LimitIndex(OLD))
+    history_db.save_many_to_db("검사과", [
+        ('사과', '가스가마이신', 0.8, 0.5, MFDS_STANDARD),
+        ('감', '다이아지논', 0.02, 0.01, PLS_STANDARD),
+        ('포도', '아세타미프리드', 1.5, 1.0, MFDS_STANDARD),
+    ], "폐기")
+    sync_history(LimitIndex(NEW)) # 사과/감 -> 적합
+    with sqlite3.connect(db) as conn:
+        ids = dict(conn.execute("SELECT 식품명, id FROM history"))
+    v0 = history_db.history_version()
+    history_db.delete_ids_from_db([ids['사과']]) # max id 가 아닌 적합 행
+    v1 = history_db.history_version()
+    assert v1 != v0 and history_db.count_history() == 2
+    history_db.delete_ids_from_db([ids['포도']]) # 마지막 부적합 행
+    assert history_db.history_version() != v1
+    assert history_db.load_summary()['total'] == 0 and history_db.count_history() == 1
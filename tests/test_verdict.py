@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from verdict import FAIL_LABEL, PASS_LABEL, RESULT_COLUMNS, LimitIndex, clean_amount, get_limit_info, judge_batch
+
+REG = pd.DataFrame({
+    'food_type': ['가지', '가지', '감자', '오이', '가지'],
+    'pesticide_name': ['가스가마이신', '다이아지논', '다이아지논', '아세타미프리드', '가스가마이신'],
+    'limit_mg_kg': ['0.3', '0.05T', ' 0.1 ', '0.7', '9.9'], # 중복 키는 처음 행 기준
+})
+
+DIRTY = pd.DataFrame({
+    '식품': [' 가지 ', '감자', None, '오이', '가지', '없는식품', '가지'],
+    '농약': ['가스가마이신 ', '다이아지논', '다이아지논', np.nan, '아세타', '가스가마이신', '가스가마이신'],
+    '검출량': ['0.5T', 'N.D.', 0.2, '1.2', np.nan, '0.011', '0.3'],
+})
+
+
+# 벡터화 이전 Tab 4 의 행 단위 루프 (get_limit_info + clean_amount)
+def legacy_loop(index, bdf):
+    rows = []
+    for _, r in bdf.iterrows():
+        f, p, v = str(r['식품']).strip(), str(r['농약']).strip(), clean_amount(r['검출량'])
+        rp, l, s = get_limit_info(index, f, p)
+        rows.append([f, rp, v, l, s, FAIL_LABEL if v > l else PASS_LABEL])
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def test_judge_batch_matches_row_loop():
+    index = LimitIndex(REG)
+    got = judge_batch(index, DIRTY)
+    exp = legacy_loop(index, DIRTY)
+    assert list(got.columns) == RESULT_COLUMNS
+    for col in ['식품', '농약', '구분', '판정']: assert got[col].tolist() == exp[col].tolist(), col
+    np.testing.assert_allclose(got['검출량'].to_numpy(), exp['검출량'].to_numpy())
+    np.testing.assert_allclose(got['기준'].to_numpy(), exp['기준'].to_numpy())
+
+
+def test_judge_batch_dirty_values():
+    got = judge_batch(LimitIndex(REG), DIRTY)
+    assert got['검출량'].tolist()[:2] == [0.5, 0.0] # '0.5T' -> 0.5, 'N.D.' -> 0.0 (clean_amount 와 동일)
+    assert got.loc[0, '기준'] == 0.3 and got.loc[0, '판정'] == FAIL_LABEL # 공백 제거 후 고시 기준, 중복은 첫 행
+    assert got.loc[2, '식품'] == 'nan' and got.loc[2, '구분'] == 'PLS (0.01)'
+    assert got.loc[5, '기준'] == 0.01 and got.loc[5, '판정'] == FAIL_LABEL
+    assert got.loc[6, '판정'] == PASS_LABEL # 기준과 같으면 적합
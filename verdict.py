@@ -0,0 +1,94 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from pest_names import PesticideResolver
+
+PLS_LIMIT = 0.01
+PLS_STANDARD = "PLS (0.01)"
+MFDS_STANDARD = "식약처 고시"
+PASS_LABEL = "✅ 적합"
+FAIL_LABEL = "🚨 부적합"
+BATCH_COLUMNS = ['식품', '농약', '검출량']
+RESULT_COLUMNS = ['식품', '농약', '검출량', '기준', '구분', '판정']
+
+
+# 숫자만 추출하는 강력한 함수
+def clean_amount(val):
+    try:
+        # 문자열로 변환 후 0-9와 .(점)만 남기고 다 삭제
+        clean_str = re.sub(r'[^0-9.]', '', str(val))
+        if not clean_str: return 0.0 # 빈 값이면 0.0 반환
+        return float(clean_str)
+    except: return 0.0
+
+
+# clean_amount의 컬럼 단위(벡터) 버전 - 변환 실패/빈 값은 0.0
+def clean_amounts(values):
+    s = pd.Series(values).astype(str).str.replace(r'[^0-9.]', '', regex=True)
+    return pd.to_numeric(s, errors='coerce').fillna(0.0).astype(float)
+
+
+class LimitIndex:
+    """기준표(df)를 한 번만 훑어서 만든 조회용 인덱스.
+
+    - limits: (food_type, pesticide_name) -> float 허용기준 (표에서 처음 나온 행 기준)
+    - resolver: 농약명 해석기 (별칭/부분일치/오타 보정, pest_names.PesticideResolver)
+    """
+
+    def __init__(self, df, aliases=None):
+        self.limits = {}
+        # reg_loader 가 미리 파싱한 float 'limit' 컬럼이 있으면 그대로 사용
+        parsed = 'limit' in df.columns
+        for food, pest, raw in zip(df['food_type'], df['pesticide_name'], df['limit' if parsed else 'limit_mg_kg']):
+            key = (food, pest)
+            if key not in self.limits: self.limits[key] = float(raw) if parsed else clean_amount(raw)
+        self.resolver = PesticideResolver(df['pesticide_name'], aliases)
+        self.names = self.resolver.names
+        self._frame = None
+
+    @property
+    def frame(self):
+        # 일괄 판정 merge용 (food_type, pesticide_name, limit) 테이블
+        if self._frame is None:
+            self._frame = pd.DataFrame(
+                [(f, p, l) for (f, p), l in self.limits.items()],
+                columns=['food_type', 'pesticide_name', 'limit'])
+        return self._frame
+
+    def resolve_pest(self, pest_input):
+        return self.resolver.resolve(pest_input)
+
+    def suggest_pest(self, pest_input, limit=3):
+        return self.resolver.suggest(pest_input, limit)
+
+    def lookup(self, food, pest_input):
+        target_pest = self.resolve_pest(pest_input)
+        limit_val = self.limits.get((food, target_pest))
+        if limit_val is not None: return target_pest, limit_val, MFDS_STANDARD
+        return target_pest, PLS_LIMIT, PLS_STANDARD
+
+
+# 기준값 가져오기 함수 (식약처 고시 우선, 없으면 PLS 0.01)
+def get_limit_info(index, food, pest_input):
+    return index.lookup(food, pest_input)
+
+
+# 일괄 판정: 행 루프 없이 정규화 -> 기준표 merge -> PLS 채우기 -> 판정을 한 번에 수행
+# bdf는 ['식품','농약','검출량'] 컬럼을 가진 DataFrame, 결과는 RESULT_COLUMNS 순서
+def judge_batch(index, bdf):
+    out = pd.DataFrame({
+        '식품': bdf['식품'].map(str).str.strip(),
+        '농약': bdf['농약'].map(str).str.strip(),
+        '검출량': clean_amounts(bdf['검출량']).to_numpy(),
+    })
+    # 농약명 해석은 고유값 단위로 한 번씩만
+    out['농약'] = out['농약'].map({p: index.resolve_pest(p) for p in out['농약'].unique()})
+    m = out.merge(index.frame, how='left', left_on=['식품', '농약'],
+                  right_on=['food_type', 'pesticide_name'])
+    hit = m['limit'].notna().to_numpy()
+    out['기준'] = m['limit'].fillna(PLS_LIMIT).to_numpy()
+    out['구분'] = np.where(hit, MFDS_STANDARD, PLS_STANDARD)
+    out['판정'] = np.where(out['검출량'].to_numpy() > out['기준'].to_numpy(), FAIL_LABEL, PASS_LABEL)
+    return out[RESULT_COLUMNS]